@@ -0,0 +1,102 @@
+import sqlite3
+
+import numpy as np
+
+from contacts_db import DB_FILE, today_day
+from relationship_analytics import DEFAULT_RATING, get_contact_stats
+
+# Adaptive frequencies: rather than treating the hand-entered frequency as fixed, a batch job
+# compares it with how often the user really gets in touch (mean_interval from the contact's
+# events) and how those contacts tend to go (mean_rating). Good ratings pull the target in,
+# poor ones push it out. Each run moves a contact part of the way towards that target, so a
+# single odd gap can't swing their frequency, and small differences are left alone.
+
+MIN_EVENTS = 3  # Events a contact needs before their cadence is trusted
+RATING_WEIGHT = 0.25  # A 5-star (or 1-star) average shortens (or lengthens) the target by this fraction
+LEARNING_RATE = 0.5  # Fraction of the gap between current and target frequency closed per run
+CHANGE_THRESHOLD = 0.1  # Proposals smaller than this fraction of the current frequency are dropped
+MIN_FREQUENCY = 1
+MAX_FREQUENCY = 730  # The longest step the frequency editor offers
+
+
+# Function to work out new frequencies from the cached relationship stats
+def learn_frequencies(stats):
+    """Return (contact_ids, frequencies, proposed_frequencies) arrays for contacts worth changing."""
+    frequency = stats['frequency']
+    mean_rating = np.where(np.isnan(stats['mean_rating']), DEFAULT_RATING, stats['mean_rating'])
+
+    preference = 1 - RATING_WEIGHT * (mean_rating - DEFAULT_RATING) / (DEFAULT_RATING - 1)
+    target = stats['mean_interval'] * preference
+    # Contacts with no frequency at all take the target as it is
+    learned = np.where(np.isnan(frequency), target, frequency + LEARNING_RATE * (target - frequency))
+
+    trusted = (stats['event_count'] >= MIN_EVENTS) & ~np.isnan(target)
+    proposed = np.clip(np.rint(np.where(trusted, learned, 0)), MIN_FREQUENCY, MAX_FREQUENCY)
+    worth_changing = np.isnan(frequency) | (
+        np.abs(proposed - frequency) >= np.maximum(1, CHANGE_THRESHOLD * np.nan_to_num(frequency)))
+
+    chosen = trusted & worth_changing
+    return stats['contact_id'][chosen], frequency[chosen], proposed[chosen].astype(np.int32)
+
+
+# Function to recompute every contact's proposal in one batch
+def propose_frequencies(db_file=DB_FILE):
+    """Replace frequency_proposals with a fresh set of proposals; returns how many there are."""
+    contact_ids, frequencies, proposed = learn_frequencies(get_contact_stats(db_file))
+    day = today_day()
+
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+
+    # One transaction, so the UI never sees a half-written set of proposals
+    cursor.execute("DELETE FROM frequency_proposals")
+    cursor.executemany('''
+        INSERT INTO frequency_proposals (contact_id, frequency, proposed_frequency, computed_day)
+        VALUES (?, ?, ?, ?)
+    ''', [(contact_id, None if frequency != frequency else int(frequency), proposed_frequency, day)
+          for contact_id, frequency, proposed_frequency
+          in zip(contact_ids.tolist(), frequencies.tolist(), proposed.tolist())])
+
+    conn.commit()
+    conn.close()
+    return len(contact_ids)
+
+
+# Function to accept pending proposals; the due_day trigger runs in the same transaction
+def apply_frequency_proposals(contact_ids=None, db_file=DB_FILE):
+    """Apply every proposal (or just those for contact_ids) and return how many contacts changed.
+
+    A proposal is skipped if the contact's frequency was changed by hand after it was computed.
+    """
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+
+    only = ''
+    params = ()
+    if contact_ids is not None:
+        only = f"AND p.contact_id IN ({', '.join('?' for _ in contact_ids)})"
+        params = tuple(contact_ids)
+
+    cursor.execute(f'''
+        UPDATE contacts
+        SET frequency = p.proposed_frequency
+        FROM frequency_proposals p
+        WHERE p.contact_id = contacts.id
+          AND p.frequency IS contacts.frequency
+          {only}
+    ''', params)
+    changed = cursor.rowcount
+
+    cursor.execute(f"DELETE FROM frequency_proposals AS p WHERE 1 {only}", params)
+
+    conn.commit()
+    conn.close()
+    return changed
+
+
+# Function run as the batch job: 'propose' only records suggestions, 'apply' also accepts them
+def update_frequencies(mode='propose', db_file=DB_FILE):
+    """Return (proposed, applied) counts."""
+    proposed = propose_frequencies(db_file)
+    applied = apply_frequency_proposals(db_file=db_file) if mode == 'apply' and proposed else 0
+    return proposed, applied
@@ -0,0 +1,319 @@
+import asyncio
+import json
+import logging
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+from contacts_db import day_to_text, insert_events, text_to_day, validate_event
+
+# An optional HTTP/JSON API for bulk access from another machine. It has no authentication, so
+# it only listens on localhost; reach it from elsewhere through an SSH tunnel (for example
+# ssh -L 8080:localhost:8080 <device>). It runs an asyncio loop on its own thread and does all
+# its database work as jobs on the app's DatabaseWorker, queued with the UI's own writes rather
+# than contending with them for the write lock (the nightly batch jobs still use their own
+# connections). Large responses are streamed: rows are fetched a page at a time and written as
+# chunks, so a full sync never builds the whole result in memory. An error part way through a
+# stream can't be reported once the 200 has gone out, so the connection is aborted instead and
+# the client sees a truncated body.
+#
+#   GET  /contacts                       every contact, streamed
+#   GET  /today                          today's plan
+#   GET  /contacts/<id>/events?limit=&before_day=&before_seq=
+#                                        one page of a contact's history, newest first
+#   GET  /events?since=YYYY-MM-DD        every event (optionally from a date on), streamed
+#   POST /events                         a JSON list of {contact_id, event_type, date, rating},
+#                                        applied all-or-nothing in one transaction
+
+log = logging.getLogger(__name__)
+
+API_HOST = '127.0.0.1'  # Localhost only: anyone who can connect can log events
+API_PORT = 8080
+STREAM_PAGE_SIZE = 500  # Rows fetched per worker job while streaming
+EVENT_PAGE_LIMIT = 200  # Largest page /contacts/<id>/events will return
+MAX_BODY_BYTES = 8 * 1024 * 1024
+MAX_HEADER_LINES = 100
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+######################### DATABASE JOBS #################################
+# Each runs on the DatabaseWorker's thread with its cursor
+
+def contacts_page_job(cursor, after_id, limit):
+    cursor.execute('''
+        SELECT id, name, phone, email, frequency, last_contact_day, due_day
+        FROM contacts
+        WHERE id > ?
+        ORDER BY id
+        LIMIT ?
+    ''', (after_id, limit))
+    return cursor.fetchall()
+
+
+def contact_events_page_job(cursor, contact_id, limit, before):
+    keyset = "AND (e.event_day < ? OR (e.event_day = ? AND e.seq < ?))" if before else ""
+    params = (contact_id, before[0], before[0], before[1], limit) if before else (contact_id, limit)
+    cursor.execute(f'''
+        SELECT e.event_day, e.seq, t.name, e.rating
+        FROM events e
+        LEFT JOIN event_types t ON t.id = e.event_type_id
+        WHERE e.contact_id = ? {keyset}
+        ORDER BY e.event_day DESC, e.seq DESC
+        LIMIT ?
+    ''', params)
+    return cursor.fetchall()
+
+
+def events_page_job(cursor, after, since_day, limit):
+    # Walks the clustered key forward from `after` = (contact_id, event_day, seq)
+    cursor.execute('''
+        SELECT e.contact_id, e.event_day, e.seq, t.name, e.rating
+        FROM events e
+        LEFT JOIN event_types t ON t.id = e.event_type_id
+        WHERE (e.contact_id > ?1 OR (e.contact_id = ?1 AND (e.event_day < ?2 OR (e.event_day = ?2 AND e.seq < ?3))))
+          AND e.event_day >= ?4
+        ORDER BY e.contact_id, e.event_day DESC, e.seq DESC
+        LIMIT ?5
+    ''', (*after, since_day, limit))
+    return cursor.fetchall()
+
+
+def contact_exists_job(cursor, contact_id):
+    cursor.execute("SELECT 1 FROM contacts WHERE id = ?", (contact_id,))
+    return cursor.fetchone() is not None
+
+
+def submit_events_job(cursor, events):
+    """Insert the validated events, or nothing if any contact id is unknown."""
+    contact_ids = sorted({event[0] for event in events})
+    cursor.execute("SELECT value FROM json_each(?) WHERE value NOT IN (SELECT id FROM contacts)",
+                   (json.dumps(contact_ids),))
+    unknown = [row[0] for row in cursor.fetchall()]
+    if unknown:
+        raise RequestError(400, f"unknown contact ids: {unknown[:20]}")
+    return insert_events(cursor, events)
+
+
+######################### HTTP #################################
+
+class ApiServer:
+    def __init__(self, worker, today_provider=None, on_events_logged=None):
+        self.worker = worker
+        self.today_provider = today_provider or (lambda: [])  # Returns [(id, name, last_contact_day), ...]
+        self.on_events_logged = on_events_logged  # Called with the validated events after a POST
+        self.loop = None
+        self.server = None
+        self.port = None
+
+    async def run_job(self, function, *args):
+        return await asyncio.wrap_future(self.worker.submit(function, *args))
+
+    async def handle_connection(self, reader, writer):
+        try:
+            try:
+                method, path, query, body = await self.read_request(reader)
+                await self.route(writer, method, path, query, body)
+            except RequestError as error:
+                await self.send_json(writer, error.status, {"error": str(error)})
+            except ValueError as error:  # Includes bad JSON
+                await self.send_json(writer, 400, {"error": str(error)})
+            except Exception as error:  # Report it to the client rather than dropping the connection
+                await self.send_json(writer, 500, {"error": repr(error)})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        request_line = (await reader.readline()).decode('latin-1').split()
+        if len(request_line) != 3:
+            raise RequestError(400, "malformed request line")
+        method, target, _ = request_line
+
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = (await reader.readline()).decode('latin-1')
+            if line in ('\r\n', '\n', ''):
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise RequestError(400, "too many headers")
+
+        length = int(headers.get('content-length', 0))
+        if length > MAX_BODY_BYTES:
+            raise RequestError(413, f"body is larger than {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b''
+
+        url = urlsplit(target)
+        return method.upper(), url.path.rstrip('/') or '/', parse_qs(url.query), body
+
+    async def route(self, writer, method, path, query, body):
+        parts = path.strip('/').split('/')
+        if parts == ['contacts'] and method == 'GET':
+            await self.stream_contacts(writer)
+        elif parts == ['today'] and method == 'GET':
+            await self.send_json(writer, 200, [
+                {"id": contact_id, "name": name, "last_contact_date": day_to_text(last_contact_day)}
+                for contact_id, name, last_contact_day in self.today_provider()])
+        elif len(parts) == 3 and parts[0] == 'contacts' and parts[2] == 'events' and method == 'GET':
+            await self.send_contact_events(writer, parse_int(parts[1], "contact id"), query)
+        elif parts == ['events'] and method == 'GET':
+            await self.stream_events(writer, query)
+        elif parts == ['events'] and method == 'POST':
+            await self.submit_events(writer, body)
+        elif parts[0] in ('contacts', 'today', 'events'):
+            raise RequestError(405, f"{method} is not supported on {path}")
+        else:
+            raise RequestError(404, f"no such resource {path}")
+
+    async def stream_contacts(self, writer):
+        async def pages():
+            after_id = 0
+            while True:
+                rows = await self.run_job(contacts_page_job, after_id, STREAM_PAGE_SIZE)
+                if not rows:
+                    return
+                after_id = rows[-1][0]
+                yield [{"id": row[0], "name": row[1], "phone": row[2], "email": row[3], "frequency": row[4],
+                        "last_contact_date": day_to_text(row[5]), "due_date": day_to_text(row[6])}
+                       for row in rows]
+        await self.stream_json_array(writer, pages())
+
+    async def stream_events(self, writer, query):
+        since = query_value(query, 'since')
+        try:
+            since_day = text_to_day(since) if since else -2 ** 31
+        except ValueError:
+            raise RequestError(400, f"since must be YYYY-MM-DD, not {since!r}") from None
+
+        async def pages():
+            after = (-1, 0, 0)
+            while True:
+                rows = await self.run_job(events_page_job, after, since_day, STREAM_PAGE_SIZE)
+                if not rows:
+                    return
+                after = rows[-1][:3]
+                yield [event_json(row[1:], contact_id=row[0]) for row in rows]
+        await self.stream_json_array(writer, pages())
+
+    async def send_contact_events(self, writer, contact_id, query):
+        if not await self.run_job(contact_exists_job, contact_id):
+            raise RequestError(404, f"no contact {contact_id}")
+        limit = parse_int(query_value(query, 'limit', '50'), "limit")
+        if limit < 1:
+            raise RequestError(400, f"limit must be at least 1, not {limit}")
+        limit = min(limit, EVENT_PAGE_LIMIT)
+        before = None
+        if query_value(query, 'before_day') is not None:
+            before = (parse_int(query_value(query, 'before_day'), "before_day"),
+                      parse_int(query_value(query, 'before_seq', '0'), "before_seq"))
+
+        rows = await self.run_job(contact_events_page_job, contact_id, limit + 1, before)
+        page, more = rows[:limit], len(rows) > limit
+        await self.send_json(writer, 200, {
+            "events": [event_json(row) for row in page],
+            "next": {"before_day": page[-1][0], "before_seq": page[-1][1]} if more else None,
+        })
+
+    async def submit_events(self, writer, body):
+        records = json.loads(body or b'null')
+        if isinstance(records, dict):
+            records = records.get('events')
+        if not isinstance(records, list):
+            raise RequestError(400, "expected a JSON list of events")
+
+        events, errors = [], []
+        for index, record in enumerate(records):
+            try:
+                if not isinstance(record, dict):
+                    raise ValueError("event must be an object")
+                events.append(validate_event(record.get('contact_id'), record.get('event_type'),
+                                             record.get('date'), record.get('rating')))
+            except ValueError as error:
+                errors.append({"index": index, "error": str(error)})
+        if errors:
+            await self.send_json(writer, 400, {"error": "invalid events; nothing was logged", "events": errors[:100]})
+            return
+
+        logged = await self.run_job(submit_events_job, events) if events else 0
+        if self.on_events_logged and events:
+            self.on_events_logged(events)
+        await self.send_json(writer, 200, {"logged": logged})
+
+    async def send_json(self, writer, status, body):
+        data = json.dumps(body).encode()
+        writer.write(f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                     f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                     f"Connection: close\r\n\r\n".encode() + data)
+        await writer.drain()
+
+    async def stream_json_array(self, writer, pages):
+        """Write pages (lists of JSON-able rows) as one JSON array, a chunk per page."""
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                     b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n")
+        try:
+            separator = b'['
+            async for page in pages:
+                if not page:
+                    continue
+                chunk = separator + b','.join(json.dumps(row).encode() for row in page)
+                separator = b','
+                writer.write(b"%X\r\n%s\r\n" % (len(chunk), chunk))
+                await writer.drain()  # Don't read the next page until the client has taken this one
+            chunk = b']' if separator == b',' else b'[]'
+            writer.write(b"%X\r\n%s\r\n0\r\n\r\n" % (len(chunk), chunk))
+            await writer.drain()
+        except ConnectionError:
+            raise
+        except Exception:
+            # Too late for an error response: drop the connection without the final chunk
+            log.exception("Streaming response failed")
+            writer.transport.abort()
+            raise ConnectionAbortedError("response aborted after its headers were sent") from None
+
+    def start(self, host=API_HOST, port=API_PORT):
+        """Serve on a background thread; returns the bound port (pass port=0 to pick a free one)."""
+        started = threading.Event()
+
+        def serve():
+            self.loop = asyncio.new_event_loop()
+            self.server = self.loop.run_until_complete(asyncio.start_server(self.handle_connection, host, port))
+            self.port = self.server.sockets[0].getsockname()[1]
+            started.set()
+            self.loop.run_forever()
+
+        threading.Thread(target=serve, daemon=True).start()
+        started.wait()
+        return self.port
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.server.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+# Function to turn an event row (event_day, seq, type, rating) into JSON
+def event_json(row, **extra):
+    event_day, seq, event_type, rating = row
+    return {**extra, "date": day_to_text(event_day), "seq": seq, "event_type": event_type, "rating": rating}
+
+
+# Function to read a single query-string value
+def query_value(query, name, default=None):
+    values = query.get(name)
+    return values[0] if values else default
+
+
+# Function to parse an integer from the path or query string
+def parse_int(text, what):
+    try:
+        return int(text)
+    except (TypeError, ValueError):
+        raise RequestError(400, f"{what} must be an integer, not {text!r}") from None
@@ -0,0 +1,114 @@
+import atexit
+import collections
+import logging
+import sys
+import threading
+
+# Logging that never does I/O on the caller's thread. Handlers only append the LogRecord to a
+# bounded ring buffer; a background thread formats and writes whatever has built up every
+# FLUSH_INTERVAL seconds, as one write and one flush per batch. If the buffer fills between
+# flushes the oldest records are dropped (and the drop is reported) rather than blocking the UI.
+# The caller's thread never waits on the writer's I/O: the handler lock logging.Handler.handle()
+# would take around emit() is skipped. emit() and the writer share only buffer_lock, held just
+# to append or to swap out the buffer and its drop count, and the writer serialises flushes with
+# a lock of its own. The message is rendered when the record is logged, so the arguments can't
+# change before it's written.
+#
+# In production the level is INFO, so the per-press debug messages in the UI loops cost one
+# level check. Debug mode lowers it to DEBUG to capture everything.
+
+RING_SIZE = 2000  # Records held between flushes
+FLUSH_INTERVAL = 2.0  # Seconds between batch writes; WARNING and above wake the writer at once
+LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s%(fields)s'
+
+
+# Formatter that appends structured fields given as log.info("...", extra={"fields": {...}})
+class FieldsFormatter(logging.Formatter):
+    def format(self, record):
+        fields = getattr(record, 'fields', None)
+        record.fields = ''.join(f' {key}={value!r}' for key, value in fields.items()) if isinstance(fields, dict) else ''
+        return super().format(record)
+
+
+# Handler that buffers records in memory for the writer thread
+class RingBufferHandler(logging.Handler):
+    def __init__(self, stream=None, capacity=RING_SIZE, flush_interval=FLUSH_INTERVAL):
+        super().__init__()
+        self.stream = stream or sys.stderr
+        self.records = collections.deque(maxlen=capacity)
+        self.dropped = 0
+        self.flush_interval = flush_interval
+        self.buffer_lock = threading.Lock()  # Keeps records and dropped in step; never held during I/O
+        self.write_lock = threading.Lock()  # The writer thread and atexit may both flush
+        self.wake = threading.Event()
+        self.writer = threading.Thread(target=self.write_batches, daemon=True)
+        self.writer.start()
+
+    def handle(self, record):
+        """Filter and emit without self.lock, which would make emit wait for the writer."""
+        result = self.filter(record)
+        if isinstance(result, logging.LogRecord):  # Python 3.12+ filters may return a replacement record
+            record = result
+        if result:
+            self.emit(record)
+        return result
+
+    def emit(self, record):
+        try:
+            record.msg = record.getMessage()  # Freeze the message while its arguments are as logged
+            record.args = None
+        except Exception:
+            self.handleError(record)
+            return
+        with self.buffer_lock:
+            if len(self.records) == self.records.maxlen:
+                self.dropped += 1  # The append pushes out the oldest record
+            self.records.append(record)
+        if record.levelno >= logging.WARNING:
+            self.wake.set()
+
+    def write_batches(self):
+        while True:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Format and write everything buffered so far (called by the writer thread and at exit)."""
+        with self.write_lock:
+            with self.buffer_lock:
+                batch = list(self.records)
+                self.records.clear()
+                dropped, self.dropped = self.dropped, 0
+            if not batch and not dropped:
+                return
+
+            lines = []
+            if dropped:
+                lines.append(f'... {dropped} log records dropped (buffer full)\n')
+            for record in batch:
+                try:
+                    lines.append(self.format(record) + '\n')
+                except Exception:
+                    self.handleError(record)
+            try:
+                self.stream.write(''.join(lines))
+                self.stream.flush()
+            except (OSError, ValueError):
+                pass  # Nowhere to report a failing log stream; the app carries on
+
+
+# Function to route all logging through the ring buffer; call once at start-up
+def setup_logging(debug=False, stream=None):
+    """Return the handler. debug=True logs everything at DEBUG and above, otherwise INFO."""
+    handler = RingBufferHandler(stream)
+    handler.setFormatter(FieldsFormatter(LOG_FORMAT))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(logging.DEBUG if debug else logging.INFO)
+
+    atexit.register(handler.flush)
+    return handler
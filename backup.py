@@ -0,0 +1,112 @@
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from contacts_db import DB_FILE
+
+# Online backups of contacts_events.db. Copying the file while the UI writes to it can catch a
+# half-written transaction, so instead SQLite's backup API copies it a few pages at a time from
+# a background thread, pausing between steps. The copy runs inside one read transaction: in WAL
+# mode that pins a consistent snapshot without blocking the UI's writes, which would otherwise
+# restart the copy every time the UI commits. Each snapshot is integrity-checked before it is
+# gzipped, and only the newest KEEP_BACKUPS are kept.
+
+log = logging.getLogger(__name__)
+
+BACKUP_DIR = 'backups'
+BACKUP_PREFIX = 'contacts_events-'
+BACKUP_SUFFIX = '.db.gz'
+BACKUP_PAGES = 64  # Pages copied per step (256 KiB with the default 4 KiB page size)
+BACKUP_STEP_PAUSE = 0.02  # Seconds between steps, leaving the SD card to the UI for a moment
+KEEP_BACKUPS = 7
+COMPRESS_CHUNK = 64 * 1024  # zlib releases the GIL per chunk, so compressing doesn't stall the UI
+
+backup_lock = threading.Lock()  # One backup at a time
+
+
+# Function to copy the live database into a verified, compressed snapshot
+def backup_database(db_file=DB_FILE, backup_dir=BACKUP_DIR):
+    """Write a new snapshot and return its path, or None if the copy failed its integrity check."""
+    os.makedirs(backup_dir, exist_ok=True)
+    name = BACKUP_PREFIX + datetime.now().strftime('%Y%m%d-%H%M%S')
+    copy_path = os.path.join(backup_dir, name + '.db.tmp')
+    snapshot_path = os.path.join(backup_dir, name + BACKUP_SUFFIX)
+
+    source = sqlite3.connect(db_file, isolation_level=None)
+    copy = sqlite3.connect(copy_path)
+    try:
+        try:
+            source.execute("BEGIN")
+            source.execute("SELECT count(*) FROM sqlite_master").fetchone()  # Takes the snapshot
+            source.backup(copy, pages=BACKUP_PAGES, progress=lambda status, remaining, total: time.sleep(BACKUP_STEP_PAUSE))
+            source.execute("COMMIT")
+            result = copy.execute("PRAGMA integrity_check").fetchone()[0]
+        finally:
+            copy.close()
+            source.close()
+
+        if result != 'ok':
+            log.error("Backup failed its integrity check: %s", result)
+            return None
+
+        with open(copy_path, 'rb') as raw, gzip.open(snapshot_path + '.tmp', 'wb') as compressed:
+            shutil.copyfileobj(raw, compressed, COMPRESS_CHUNK)
+        os.replace(snapshot_path + '.tmp', snapshot_path)
+    finally:
+        # The uncompressed copy goes whether the backup worked or not, and so does a half-written .gz
+        for path in (copy_path, snapshot_path + '.tmp'):
+            if os.path.exists(path):
+                os.remove(path)
+    return snapshot_path
+
+
+# Function to list the snapshots in a backup directory, oldest first
+def list_backups(backup_dir=BACKUP_DIR):
+    if not os.path.isdir(backup_dir):
+        return []
+    names = sorted(name for name in os.listdir(backup_dir)
+                   if name.startswith(BACKUP_PREFIX) and name.endswith(BACKUP_SUFFIX))
+    return [os.path.join(backup_dir, name) for name in names]
+
+
+# Function to delete all but the newest `keep` snapshots
+def rotate_backups(backup_dir=BACKUP_DIR, keep=KEEP_BACKUPS):
+    """Return the paths that were deleted."""
+    expired = list_backups(backup_dir)[:-keep] if keep else list_backups(backup_dir)
+    for path in expired:
+        os.remove(path)
+    return expired
+
+
+# Function run on the backup thread
+def run_backup(db_file=DB_FILE, backup_dir=BACKUP_DIR, keep=KEEP_BACKUPS):
+    if not backup_lock.acquire(blocking=False):
+        return  # The previous backup is still running
+    try:
+        start = time.monotonic()
+        snapshot_path = backup_database(db_file, backup_dir)
+        if snapshot_path:
+            rotate_backups(backup_dir, keep)
+            log.info("Backed up to %s in %.1fs", snapshot_path, time.monotonic() - start)
+    finally:
+        backup_lock.release()
+
+
+# Function to take a backup in the background, optionally only if the newest one is old enough
+def start_backup_thread(db_file=DB_FILE, backup_dir=BACKUP_DIR, if_older_than=None):
+    """Start a backup thread and return it, or None if a recent enough snapshot exists.
+
+    if_older_than is in seconds; leave it None to always take a backup.
+    """
+    backups = list_backups(backup_dir)
+    if if_older_than is not None and backups and time.time() - os.path.getmtime(backups[-1]) < if_older_than:
+        return None
+
+    thread = threading.Thread(target=run_backup, args=(db_file, backup_dir), daemon=True)
+    thread.start()
+    return thread
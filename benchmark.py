@@ -0,0 +1,235 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import contacts_db
+import relationship_analytics
+from contacts_db import EVENT_TYPES
+from generate_dataset import get_fixture
+
+# Times the data access functions the UI calls against generated databases of increasing size.
+# Each function gets three separate passes so the instruments don't skew each other:
+#   latency  - wall time per call, reported as percentiles
+#   queries  - every statement the call runs (trace callback), its EXPLAIN QUERY PLAN and the
+#              number of SQLite VM steps it took (progress handler), i.e. how much it scanned
+#   memory   - Python allocations during one call (tracemalloc)
+# Results are written as JSON. Given a baseline file from an earlier run, the run fails if any
+# function got slower, does more VM work, or picked up a full table scan it didn't have.
+
+DEFAULT_SIZES = [(1000, 10000), (10000, 100000), (100000, 1000000)]  # (contacts, events)
+DEFAULT_ITERATIONS = 50
+WARMUP_ITERATIONS = 3
+PROGRESS_STEP = 100  # VM instructions between progress handler calls
+LATENCY_TOLERANCE = 0.5  # A p50 this much above the baseline is a regression...
+LATENCY_FLOOR_MS = 1.0  # ...as long as it is also at least this much slower (commits wait on fsync)
+VM_STEP_TOLERANCE = 0.10  # Same, for VM steps, which are deterministic and so held tighter
+
+
+# Function to build the (name, call) pairs to benchmark against one database
+def benchmark_cases(db_file, contact_ids, rng):
+    eligible = contacts_db.get_contactable_contacts(db_file)
+    return [
+        ("get_contactable_contacts", lambda: contacts_db.get_contactable_contacts(db_file)),
+        ("get_all_contacts", lambda: contacts_db.get_all_contacts(db_file)),
+        ("pick_neglected_contacts", lambda: pick_todays_contacts(eligible, db_file)),
+        ("log_event_to_db", lambda: contacts_db.log_event_to_db(
+            rng.choice(contact_ids), rng.choice(EVENT_TYPES), rng.randint(1, 5), db_file)),
+        ("mark_contact_as_done", lambda: contacts_db.mark_contact_as_done(rng.choice(contact_ids), db_file)),
+    ]
+
+
+# Function to draw today's plan the way the UI does at midnight, when the cached stats are stale
+def pick_todays_contacts(eligible, db_file):
+    relationship_analytics.stats_cache = None  # A new day always re-reads the stats
+    return relationship_analytics.pick_neglected_contacts(eligible, db_file=db_file)
+
+
+# Function to time a call repeatedly
+def measure_latency(call, iterations):
+    """Return latency percentiles in milliseconds."""
+    for _ in range(WARMUP_ITERATIONS):
+        call()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter_ns()
+        call()
+        samples.append((time.perf_counter_ns() - start) / 1e6)
+    samples.sort()
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return {"p50_ms": cuts[49], "p90_ms": cuts[89], "p99_ms": cuts[98], "max_ms": samples[-1],
+            "mean_ms": statistics.fmean(samples)}
+
+
+# Function to run one call with every connection it opens instrumented
+def measure_queries(call, db_file):
+    """Return the statements one call runs, with their query plans and the VM work they did."""
+    statements = []
+    steps = [0]
+
+    def on_progress():
+        steps[0] += PROGRESS_STEP
+        return 0
+
+    def on_statement(sql):
+        sql = " ".join(sql.split())
+        # Each trigger a statement fires is traced again under the statement's own SQL
+        if not statements or statements[-1]["sql"] != sql:
+            statements.append({"sql": sql, "vm_steps_before": steps[0]})
+
+    connect = sqlite3.connect
+
+    def instrumented_connect(*args, **kwargs):
+        conn = connect(*args, **kwargs)
+        conn.set_trace_callback(on_statement)
+        conn.set_progress_handler(on_progress, PROGRESS_STEP)
+        return conn
+
+    sqlite3.connect = instrumented_connect
+    try:
+        call()
+    finally:
+        sqlite3.connect = connect
+
+    # Each statement's share of the VM steps is what ran between it and the next one
+    for statement, following in zip(statements, statements[1:] + [{"vm_steps_before": steps[0]}]):
+        statement["vm_steps"] = following["vm_steps_before"] - statement.pop("vm_steps_before")
+
+    conn = connect(db_file)
+    for statement in statements:
+        statement["plan"] = explain_query_plan(conn, statement["sql"])
+    conn.close()
+
+    full_scans = sorted({line for statement in statements for line in statement["plan"]
+                         if line.startswith("SCAN ") and "USING" not in line})
+    return {"vm_steps": steps[0], "full_scans": full_scans, "statements": statements}
+
+
+# Function to get the query plan of a traced statement (which has its parameters filled in)
+def explain_query_plan(conn, sql):
+    if sql.split(" ", 1)[0].upper() not in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH"):
+        return []  # BEGIN, COMMIT, PRAGMA and trigger bodies have no plan of their own
+    try:
+        return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+    except sqlite3.Error:
+        return []
+
+
+# Function to measure the Python memory one call allocates
+def measure_allocations(call):
+    """Return the bytes still allocated after the call and the peak during it."""
+    tracemalloc.start()
+    try:
+        call()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"retained_bytes": current, "peak_bytes": peak}
+
+
+# Function to benchmark every case against one fixture size
+def benchmark_size(contact_count, event_count, iterations, seed):
+    fixture = get_fixture(contact_count, event_count, seed)
+    # The writes would change the shared fixture, so they go to a throwaway copy
+    work_dir = tempfile.mkdtemp(prefix="contacts_bench_")
+    db_file = os.path.join(work_dir, "contacts_events.db")
+    shutil.copyfile(fixture, db_file)
+    contacts_db.setup_database(db_file)  # As the UI does at start-up; brings a fixture cached by an older version up to date
+
+    try:
+        rng = random.Random(seed)
+        contact_ids = [row[0] for row in contacts_db.get_all_contacts(db_file)]
+        results = {}
+        for name, call in benchmark_cases(db_file, contact_ids, rng):
+            results[name] = {
+                "latency": measure_latency(call, iterations),
+                "queries": measure_queries(call, db_file),
+                "memory": measure_allocations(call),
+            }
+            print(f"  {name:28} p50 {results[name]['latency']['p50_ms']:8.3f} ms  "
+                  f"p99 {results[name]['latency']['p99_ms']:8.3f} ms  "
+                  f"vm {results[name]['queries']['vm_steps']:>10}  "
+                  f"peak {results[name]['memory']['peak_bytes'] / 1024:9.1f} KiB")
+        return results
+    finally:
+        shutil.rmtree(work_dir)
+
+
+# Function to list how a run is worse than a baseline run
+def find_regressions(results, baseline):
+    """Return a list of human-readable regressions of `results` against `baseline`."""
+    regressions = []
+    for size, functions in results["sizes"].items():
+        for name, current in functions.items():
+            previous = baseline.get("sizes", {}).get(size, {}).get(name)
+            if previous is None:
+                continue
+
+            now, before = current["latency"]["p50_ms"], previous["latency"]["p50_ms"]
+            if now > before * (1 + LATENCY_TOLERANCE) and now - before > LATENCY_FLOOR_MS:
+                regressions.append(f"{size} {name}: p50 {before:.3f} -> {now:.3f} ms")
+
+            now, before = current["queries"]["vm_steps"], previous["queries"]["vm_steps"]
+            if now > before * (1 + VM_STEP_TOLERANCE) and now - before > PROGRESS_STEP:
+                regressions.append(f"{size} {name}: VM steps {before} -> {now}")
+
+            for scan in set(current["queries"]["full_scans"]) - set(previous["queries"]["full_scans"]):
+                regressions.append(f"{size} {name}: new full scan '{scan}'")
+    return regressions
+
+
+# Function to run the whole suite
+def run_benchmarks(sizes=DEFAULT_SIZES, iterations=DEFAULT_ITERATIONS, seed=0):
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "machine": platform.machine(),
+        "iterations": iterations,
+        "seed": seed,
+        "sizes": {},
+    }
+    for contact_count, event_count in sizes:
+        size = f"{contact_count}x{event_count}"
+        print(f"{contact_count} contacts, {event_count} events")
+        results["sizes"][size] = benchmark_size(contact_count, event_count, iterations, seed)
+    return results
+
+
+# Function to read "CONTACTSxEVENTS" size arguments
+def parse_size(text):
+    contacts, events = text.lower().split("x")
+    return int(contacts), int(events)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the contacts data access functions.")
+    parser.add_argument("--size", type=parse_size, action="append", dest="sizes",
+                        help="CONTACTSxEVENTS, may be repeated (default: 1000x10000 10000x100000 100000x1000000)")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json", help="where to write this run's results")
+    parser.add_argument("--baseline", help="results of an earlier run; any regression against it fails the run")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes or DEFAULT_SIZES, args.iterations, args.seed)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f))
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against", args.baseline)
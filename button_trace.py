@@ -0,0 +1,185 @@
+import atexit
+import bisect
+import json
+import os
+import struct
+import threading
+import time
+from datetime import datetime
+
+# Records every button edge during normal use, so a session that felt slow can be played
+# back later through the same input layer and timed. A trace is a small header and then 5
+# bytes per edge: milliseconds since the previous edge, and the pin with the top bit set for
+# a release. Edges are packed in memory from the GPIO thread and a writer thread appends them
+# to the file every FLUSH_INTERVAL, so recording costs the UI no I/O. The UI's callback only
+# fires on presses (falling edges), so a release is found by a watcher thread that polls each
+# pin still held down every RELEASE_POLL seconds; a press that arrives while its pin is still
+# marked held (released and pressed again between polls) is recorded with a release before it.
+#
+# The header records the screen stack the session started on, so a replay can start from the
+# same screen. Replays capture every frame sent to the display (see FrameCapture) and time how
+# long each press took to reach the screen.
+
+TRACE_DIR = 'traces'
+TRACE_PREFIX = 'buttons-'
+TRACE_SUFFIX = '.trace'
+KEEP_TRACES = 20  # Sessions kept; older traces are deleted when a new one starts
+FLUSH_INTERVAL = 5.0  # Seconds between appends to the trace file
+RELEASE_POLL = 0.01  # Seconds between checks of the pins held down
+
+TRACE_MAGIC = b'NBTR'
+FRAMES_MAGIC = b'NBFR'
+TRACE_VERSION = 1
+HEADER = struct.Struct('<4sBH')  # Magic, version, length of the JSON header that follows
+EDGE = struct.Struct('<IB')  # Milliseconds since the previous edge, pin | RELEASE_FLAG
+FRAME = struct.Struct('<IH')  # Milliseconds since the replay started, frame length
+RELEASE_FLAG = 0x80
+MAX_EDGE_GAP_MS = 2 ** 32 - 1
+
+
+class TraceRecorder:
+    def __init__(self, path, screens=()):
+        self.path = path
+        self.start = time.monotonic()
+        self.last_ms = 0
+        self.pending = bytearray()
+        self.lock = threading.Lock()
+        self.held = {}  # Pin -> function returning whether it is still down
+        self.held_lock = threading.Lock()  # Press and release of one pin are recorded in order
+        self.pressed = threading.Event()
+
+        info = json.dumps({"started": datetime.now().isoformat(timespec='seconds'), "screens": list(screens)}).encode()
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(TRACE_MAGIC, TRACE_VERSION, len(info)) + info)
+        threading.Thread(target=self.run, daemon=True).start()
+        threading.Thread(target=self.watch_releases, daemon=True).start()
+        atexit.register(self.flush)
+
+    def record(self, pin, pressed):
+        """Add one edge; called from the GPIO callback thread, so it only packs bytes."""
+        with self.lock:
+            now_ms = int((time.monotonic() - self.start) * 1000)
+            gap = min(now_ms - self.last_ms, MAX_EDGE_GAP_MS)
+            self.last_ms = now_ms
+            self.pending += EDGE.pack(gap, pin if pressed else pin | RELEASE_FLAG)
+
+    def press(self, pin, is_held):
+        """Record a press, and its release once is_held() returns False; called from the GPIO callback."""
+        with self.held_lock:
+            if pin in self.held:
+                self.record(pin, False)  # Its release fell between two polls
+            self.record(pin, True)
+            self.held[pin] = is_held
+        self.pressed.set()
+
+    def watch_releases(self):
+        while True:
+            self.pressed.wait()
+            self.pressed.clear()
+            while self.held:
+                time.sleep(RELEASE_POLL)
+                for pin, is_held in list(self.held.items()):
+                    if is_held():
+                        continue
+                    with self.held_lock:
+                        if self.held.get(pin) is is_held:  # Not pressed again since it was read
+                            del self.held[pin]
+                            self.record(pin, False)
+
+    def run(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            data, self.pending = self.pending, bytearray()
+        if data:
+            with open(self.path, 'ab') as f:
+                f.write(data)
+
+
+# Function to start recording a new session's trace, deleting the oldest traces
+def start_trace_recorder(screens=(), trace_dir=TRACE_DIR, keep=KEEP_TRACES):
+    """Return a TraceRecorder writing to a new timestamped file in trace_dir."""
+    os.makedirs(trace_dir, exist_ok=True)
+    traces = sorted(name for name in os.listdir(trace_dir)
+                    if name.startswith(TRACE_PREFIX) and name.endswith(TRACE_SUFFIX))
+    for name in traces[:max(0, len(traces) - keep + 1)]:  # Make room for the new one
+        os.remove(os.path.join(trace_dir, name))
+
+    name = f"{TRACE_PREFIX}{datetime.now().strftime('%Y%m%d-%H%M%S')}{TRACE_SUFFIX}"
+    return TraceRecorder(os.path.join(trace_dir, name), screens)
+
+
+# Function to read a trace file
+def read_trace(path):
+    """Return (header dict, [(seconds from start, pin, pressed), ...]). Raises ValueError if it isn't a trace."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} is not a button trace")
+    magic, version, info_length = HEADER.unpack_from(data)
+    if magic != TRACE_MAGIC or version != TRACE_VERSION:
+        raise ValueError(f"{path} is not a version {TRACE_VERSION} button trace")
+    info = json.loads(data[HEADER.size:HEADER.size + info_length])
+
+    edges = []
+    elapsed_ms = 0
+    body = data[HEADER.size + info_length:]
+    for gap, code in EDGE.iter_unpack(body[:len(body) - len(body) % EDGE.size]):  # A torn last edge is dropped
+        elapsed_ms += gap
+        edges.append((elapsed_ms / 1000, code & ~RELEASE_FLAG, not code & RELEASE_FLAG))
+    return info, edges
+
+
+# Function to play edges back in real time, scaled by speed
+def replay_edges(edges, on_edge, speed=1.0):
+    """Call on_edge(pin, pressed) for each edge when its (scaled) time comes; blocks until done."""
+    start = time.monotonic()
+    for seconds, pin, pressed in edges:
+        delay = start + seconds / speed - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        on_edge(pin, pressed)
+
+
+# Captures the frames a replay sends to the display, and when the replayed presses happened
+class FrameCapture:
+    def __init__(self):
+        self.start = time.monotonic()
+        self.frames = []  # (seconds from start, frame bytes)
+        self.presses = []  # Seconds from start
+
+    def press(self):
+        self.presses.append(time.monotonic() - self.start)
+
+    def frame(self, buffer):
+        self.frames.append((time.monotonic() - self.start, bytes(buffer)))
+
+    def press_latencies(self):
+        """Return, per press, the seconds until the next frame reached the display (None if none did)."""
+        frame_times = [seconds for seconds, _ in self.frames]
+        latencies = []
+        for pressed_at in self.presses:
+            index = bisect.bisect_left(frame_times, pressed_at)
+            latencies.append(frame_times[index] - pressed_at if index < len(frame_times) else None)
+        return latencies
+
+    def summary(self):
+        latencies = sorted(latency for latency in self.press_latencies() if latency is not None)
+        if not latencies:
+            return f"{len(self.presses)} presses, {len(self.frames)} frames, no press reached the display"
+
+        def percentile(fraction):
+            return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000
+        return (f"{len(self.presses)} presses, {len(self.frames)} frames; press to frame "
+                f"p50 {percentile(.5):.0f} ms, p95 {percentile(.95):.0f} ms, max {latencies[-1] * 1000:.0f} ms"
+                + (f", {len(self.presses) - len(latencies)} presses with no frame" if len(latencies) < len(self.presses) else ""))
+
+    def write(self, path):
+        """Save the frames: a magic number, then per frame its time in ms, length and raw bytes."""
+        with open(path, 'wb') as f:
+            f.write(FRAMES_MAGIC)
+            for seconds, frame in self.frames:
+                f.write(FRAME.pack(int(seconds * 1000), len(frame)) + frame)
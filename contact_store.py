@@ -0,0 +1,190 @@
+import mmap
+import os
+import sqlite3
+import struct
+from array import array
+
+from contacts_db import DB_FILE
+
+STORE_SNAPSHOT_FILE = 'contact_store.bin'
+
+# Snapshot layout: header, then ids, due_days and name offsets as native int32, then the name blob
+SNAPSHOT_MAGIC = b'CSTORE1\0'
+SNAPSHOT_HEADER = struct.Struct('<8sqqqq')  # magic, db mtime_ns, db size, contact count, blob length
+NO_DUE_DAY = -2 ** 31  # due_day of a contact with no last contact date or frequency
+
+
+# A compact, read-only copy of the contacts needed by the list screens, sorted by name.
+# Instead of one tuple per contact it keeps three int32 columns and a single UTF-8 blob,
+# which is a few bytes per contact plus the name itself. Loaded from a snapshot file the
+# columns are memoryviews straight onto an mmap, so nothing is copied at boot.
+class ContactStore:
+    def __init__(self, ids, due_days, offsets, blob, source=None, mapping=None):
+        self.ids = ids
+        self.due_days = due_days
+        self.offsets = offsets  # Name i is blob[offsets[i]:offsets[i + 1]]
+        self.blob = blob
+        self.source = source  # (mtime_ns, size) of the database the store was built from
+        self.mapping = mapping  # Keeps the snapshot's mmap open while the memoryviews use it
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.ids)
+        if not 0 <= index < len(self.ids):
+            raise IndexError('contact index out of range')
+        return ContactView(self, index)
+
+    def __iter__(self):
+        for index in range(len(self.ids)):
+            yield ContactView(self, index)
+
+    def name(self, index):
+        return bytes(self.blob[self.offsets[index]:self.offsets[index + 1]]).decode('utf-8')
+
+    def due_day(self, index):
+        day = self.due_days[index]
+        return None if day == NO_DUE_DAY else day
+
+    def close(self):
+        """Unmap a store loaded from a snapshot; it can't be used afterwards."""
+        if self.mapping is not None:
+            for column in (self.ids, self.due_days, self.offsets, self.blob):
+                column.release()  # mmap refuses to close while views onto it exist
+            self.mapping.close()
+            self.mapping = None
+
+
+# A lightweight handle on one contact in a ContactStore. It indexes like the (id, name)
+# tuples get_all_contacts returns, so the list screens can use either.
+class ContactView:
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    @property
+    def id(self):
+        return self.store.ids[self.index]
+
+    @property
+    def name(self):
+        return self.store.name(self.index)
+
+    @property
+    def due_day(self):
+        return self.store.due_day(self.index)
+
+    def __getitem__(self, field):
+        if field == 0:
+            return self.id
+        if field == 1:
+            return self.name
+        raise IndexError('contact view has fields 0 (id) and 1 (name)')
+
+    def __repr__(self):
+        return f'ContactView({self.id}, {self.name!r})'
+
+
+# Function to identify the version of the database a store was built from
+def database_signature(db_file=DB_FILE):
+    """Return (mtime_ns, size) of the database file and its WAL; any write to either changes this."""
+    stat = os.stat(db_file)
+    mtime_ns, size = stat.st_mtime_ns, stat.st_size
+    # In WAL mode commits land in the -wal file and only reach the main file at a checkpoint
+    if os.path.exists(db_file + '-wal'):
+        wal_stat = os.stat(db_file + '-wal')
+        mtime_ns, size = max(mtime_ns, wal_stat.st_mtime_ns), size + wal_stat.st_size
+    return mtime_ns, size
+
+
+# Function to build a store from the contacts table
+def build_contact_store(db_file=DB_FILE):
+    """Read id, name and due_day for every contact, sorted by name, into compact columns."""
+    source = database_signature(db_file)
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+
+    ids = array('i')
+    due_days = array('i')
+    offsets = array('i', [0])
+    blob = bytearray()
+
+    cursor.execute("SELECT id, name, due_day FROM contacts ORDER BY name")
+    for contact_id, name, due_day in cursor:
+        ids.append(contact_id)
+        due_days.append(NO_DUE_DAY if due_day is None else due_day)
+        blob += name.encode('utf-8')
+        offsets.append(len(blob))
+
+    conn.close()
+    return ContactStore(ids, due_days, offsets, bytes(blob), source)
+
+
+# Function to write a store to a snapshot file, atomically
+def save_contact_store(store, path=STORE_SNAPSHOT_FILE):
+    """Write the store so load_contact_store can map it back without parsing."""
+    mtime_ns, size = store.source
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, mtime_ns, size, len(store), len(store.blob)))
+        f.write(bytes(store.ids))
+        f.write(bytes(store.due_days))
+        f.write(bytes(store.offsets))
+        f.write(store.blob)
+    os.replace(temp_path, path)
+
+
+# Function to map a snapshot file back into a store without copying it
+def load_contact_store(path=STORE_SNAPSHOT_FILE):
+    """Return the ContactStore in the snapshot, or None if the file is missing or unreadable."""
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, 'rb') as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):  # ValueError: an empty file can't be mapped
+        return None
+    if len(mapping) < SNAPSHOT_HEADER.size:
+        mapping.close()
+        return None
+
+    magic, mtime_ns, size, count, blob_length = SNAPSHOT_HEADER.unpack_from(mapping)
+    end = SNAPSHOT_HEADER.size + count * 4 * 3 + 4 + blob_length
+    if magic != SNAPSHOT_MAGIC or len(mapping) != end:
+        mapping.close()
+        return None
+
+    view = memoryview(mapping)
+    position = SNAPSHOT_HEADER.size
+    ids = view[position:position + count * 4].cast('i')
+    position += count * 4
+    due_days = view[position:position + count * 4].cast('i')
+    position += count * 4
+    offsets = view[position:position + (count + 1) * 4].cast('i')
+    position += (count + 1) * 4
+    blob = view[position:position + blob_length]
+
+    return ContactStore(ids, due_days, offsets, blob, (mtime_ns, size), mapping)
+
+
+# Function to get an up-to-date store, preferring the snapshot and rebuilding it when stale
+def get_contact_store(db_file=DB_FILE, path=STORE_SNAPSHOT_FILE, current=None):
+    """Return `current` if still fresh, else the snapshot if it matches the database, else a rebuilt store."""
+    source = database_signature(db_file)
+    if current is not None and current.source == source:
+        return current
+
+    store = load_contact_store(path)
+    if store is not None and store.source == source:
+        return store
+    if store is not None:
+        store.close()  # Stale: it is about to be replaced
+
+    store = build_contact_store(db_file)
+    save_contact_store(store, path)
+    return store
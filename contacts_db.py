@@ -0,0 +1,771 @@
+import json
+import random
+import sqlite3
+from datetime import date
+
+DB_FILE = 'contacts_events.db'
+
+
+# Function to bring an existing contacts_events.db up to the schema the UI expects
+def setup_database(db_file=DB_FILE):
+    """Create the search index and any other derived tables if they are missing."""
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+
+    # Write-ahead logging: readers (backups, reports) see a stable snapshot while the UI keeps writing
+    cursor.execute("PRAGMA journal_mode = WAL")
+
+    migrate_to_epoch_days(cursor)
+    migrate_events_to_compact(cursor)
+    setup_contacts_search(cursor)
+    setup_due_dates(cursor)
+    setup_due_day_counts(cursor)
+    setup_name_index(cursor)
+    setup_contact_stats(cursor)
+    setup_frequency_proposals(cursor)
+    setup_event_archive(cursor)
+    setup_text_date_views(cursor)
+
+    conn.commit()
+    conn.close()
+
+
+######################### EPOCH DAYS #################################
+
+# Dates are stored as whole days since 1970-01-01, so due/overdue checks are integer compares
+EPOCH = date(1970, 1, 1)
+
+
+# Function to get today's local date as an epoch day
+def today_day():
+    """Return today's date as days since 1970-01-01."""
+    return date.today().toordinal() - EPOCH.toordinal()
+
+
+# Function to turn an epoch day back into 'YYYY-MM-DD' for display
+def day_to_text(day):
+    """Return 'YYYY-MM-DD' for an epoch day, or None for None."""
+    if day is None:
+        return None
+    return date.fromordinal(EPOCH.toordinal() + day).isoformat()
+
+
+# Function to turn 'YYYY-MM-DD' into an epoch day
+def text_to_day(text):
+    """Return the epoch day of a 'YYYY-MM-DD' date; raises ValueError if it isn't one."""
+    return date.fromisoformat(text).toordinal() - EPOCH.toordinal()
+
+
+# Function to move an older database from TEXT 'YYYY-MM-DD' dates to integer epoch days
+def migrate_to_epoch_days(cursor):
+    """Replace contacts.last_contact_date/snooze_until and events.event_date with *_day INTEGER columns.
+
+    Runs as one transaction (SQLite DDL is transactional), and is keyed on the old columns still
+    being there, so a migration that was interrupted is rolled back and simply runs again.
+    """
+    cursor.execute("PRAGMA table_info(contacts)")
+    contact_columns = [row[1] for row in cursor.fetchall()]
+    cursor.execute("PRAGMA table_info(events)")
+    event_columns = [row[1] for row in cursor.fetchall()]
+    if 'last_contact_date' not in contact_columns and 'event_date' not in event_columns:
+        return
+
+    if not cursor.connection.in_transaction:
+        cursor.execute("BEGIN")
+
+    if 'last_contact_date' in contact_columns:
+        # Anything derived from the text columns goes first, or DROP COLUMN refuses to run
+        cursor.execute("DROP TRIGGER IF EXISTS contacts_due_date_insert")
+        cursor.execute("DROP TRIGGER IF EXISTS contacts_due_date_update")
+        cursor.execute("DROP INDEX IF EXISTS contacts_due_date")
+
+        if 'last_contact_day' not in contact_columns:  # Left by a migration from before it was atomic
+            cursor.execute("ALTER TABLE contacts ADD COLUMN last_contact_day INTEGER")
+        cursor.execute(f"UPDATE contacts SET last_contact_day = {text_to_day_sql('last_contact_date')}")
+        cursor.execute("ALTER TABLE contacts DROP COLUMN last_contact_date")
+
+    if 'snooze_until' in contact_columns:
+        if 'snooze_until_day' not in contact_columns:
+            cursor.execute("ALTER TABLE contacts ADD COLUMN snooze_until_day INTEGER")
+        cursor.execute(f"UPDATE contacts SET snooze_until_day = {text_to_day_sql('snooze_until')}")
+        cursor.execute("ALTER TABLE contacts DROP COLUMN snooze_until")
+    if 'due_date' in contact_columns:
+        cursor.execute("ALTER TABLE contacts DROP COLUMN due_date")
+
+    if 'event_date' in event_columns:
+        cursor.execute("DROP INDEX IF EXISTS events_contact_date")
+        if 'event_day' not in event_columns:
+            cursor.execute("ALTER TABLE events ADD COLUMN event_day INTEGER")
+        cursor.execute(f"UPDATE events SET event_day = {text_to_day_sql('event_date')}")
+        cursor.execute("ALTER TABLE events DROP COLUMN event_date")
+
+    cursor.connection.commit()
+
+
+# Function to build the SQL that converts a 'YYYY-MM-DD' column to an epoch day (NULL stays NULL)
+def text_to_day_sql(column):
+    """Return an SQL expression for the epoch day of a TEXT date column."""
+    return f"CAST(julianday({column}) - 2440587.5 AS INTEGER)"
+
+
+# Function to give scripts and hand queries the old text date columns back
+def setup_text_date_views(cursor):
+    """Create contacts_dated and events_dated, which show the *_day columns as 'YYYY-MM-DD' text."""
+    cursor.execute('''
+        CREATE VIEW IF NOT EXISTS contacts_dated AS
+        SELECT id, name, phone, email, rating, frequency,
+               date(last_contact_day * 86400, 'unixepoch') AS last_contact_date,
+               date(snooze_until_day * 86400, 'unixepoch') AS snooze_until,
+               date(due_day * 86400, 'unixepoch') AS due_date
+        FROM contacts
+    ''')
+    cursor.execute('''
+        CREATE VIEW IF NOT EXISTS events_dated AS
+        SELECT e.contact_id, e.seq, t.name AS event_type,
+               date(e.event_day * 86400, 'unixepoch') AS event_date,
+               e.rating
+        FROM events e
+        LEFT JOIN event_types t ON t.id = e.event_type_id
+    ''')
+
+
+######################### EVENT STORAGE #################################
+
+# Event types offered by the Log Event flow, stored once in event_types and referenced by id
+EVENT_TYPES = ["Email", "Phone Call", "In-person"]
+
+
+# Function to move events to a compact layout: integer type codes, clustered by contact and day
+def migrate_events_to_compact(cursor):
+    """Rebuild events as a WITHOUT ROWID table keyed (contact_id, event_day DESC, seq DESC).
+
+    The key is the order the Contact Card reads history in, so the table needs no separate
+    index. seq numbers a contact's events within one day. event_type text becomes
+    event_type_id into event_types, and ratings outside 1-5 become NULL. Rows with no contact
+    or no date can't be placed in the history; they are kept in events_rejected instead.
+    The rebuild is one transaction.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS event_types (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    ''')
+    cursor.executemany("INSERT OR IGNORE INTO event_types (name) VALUES (?)", [(name,) for name in EVENT_TYPES])
+
+    cursor.execute("PRAGMA table_info(events)")
+    columns = [row[1] for row in cursor.fetchall()]
+    if 'event_type_id' in columns:
+        return
+
+    if not cursor.connection.in_transaction:
+        cursor.execute("BEGIN")
+    cursor.execute("INSERT OR IGNORE INTO event_types (name) SELECT DISTINCT event_type FROM events WHERE event_type IS NOT NULL")
+
+    cursor.execute('''
+        CREATE TABLE events_compact (
+            contact_id INTEGER NOT NULL REFERENCES contacts(id),
+            event_day INTEGER NOT NULL,
+            seq INTEGER NOT NULL,
+            event_type_id INTEGER REFERENCES event_types(id),
+            rating INTEGER CHECK (rating BETWEEN 1 AND 5),
+            PRIMARY KEY (contact_id, event_day DESC, seq DESC)
+        ) WITHOUT ROWID
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS events_rejected (
+            id INTEGER PRIMARY KEY,  -- The row's id in the old events table
+            contact_id INTEGER,
+            event_type TEXT,
+            event_day INTEGER,
+            rating INTEGER,
+            reason TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO events_rejected (id, contact_id, event_type, event_day, rating, reason)
+        SELECT id, contact_id, event_type, event_day, rating,
+               CASE WHEN contact_id IS NULL THEN 'no contact' ELSE 'no date' END
+        FROM events
+        WHERE contact_id IS NULL OR event_day IS NULL
+    ''')
+
+    cursor.execute('''
+        INSERT INTO events_compact (contact_id, event_day, seq, event_type_id, rating)
+        SELECT e.contact_id,
+               e.event_day,
+               row_number() OVER (PARTITION BY e.contact_id, e.event_day ORDER BY e.id),
+               t.id,
+               CASE WHEN e.rating BETWEEN 1 AND 5 THEN e.rating END
+        FROM events e
+        LEFT JOIN event_types t ON t.name = e.event_type
+        WHERE e.contact_id IS NOT NULL AND e.event_day IS NOT NULL
+    ''')
+
+    cursor.execute("DROP VIEW IF EXISTS events_dated")
+    cursor.execute("DROP TABLE events")
+    cursor.execute("ALTER TABLE events_compact RENAME TO events")
+    cursor.connection.commit()
+
+
+# Function to add one event row, looking up (or registering) its type code
+def insert_event(cursor, contact_id, event_day, event_type, rating):
+    """Insert an event using the caller's cursor, so it joins the caller's transaction."""
+    cursor.execute("INSERT OR IGNORE INTO event_types (name) VALUES (?)", (event_type,))
+    cursor.execute('''
+        INSERT INTO events (contact_id, event_day, seq, event_type_id, rating)
+        VALUES (
+            ?, ?,
+            (SELECT coalesce(max(seq), 0) + 1 FROM events WHERE contact_id = ? AND event_day = ?),
+            (SELECT id FROM event_types WHERE name = ?),
+            ?
+        )
+    ''', (contact_id, event_day, contact_id, event_day, event_type, rating))
+
+
+# Function to create the table old events are rolled up into by event_archive
+def setup_event_archive(cursor):
+    """Create event_archive: per contact, month and event type, how many events and their ratings."""
+    # month_day is the epoch day of the first of the month; rating_count excludes unrated events
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS event_archive (
+            contact_id INTEGER NOT NULL,
+            month_day INTEGER NOT NULL,
+            event_type_id INTEGER NOT NULL,
+            event_count INTEGER NOT NULL,
+            rating_count INTEGER NOT NULL,
+            rating_sum INTEGER NOT NULL,
+            last_event_day INTEGER NOT NULL,
+            first_event_day INTEGER,
+            PRIMARY KEY (contact_id, month_day, event_type_id)
+        ) WITHOUT ROWID
+    ''')
+    # Archives made before first_event_day was kept leave it NULL; month_day stands in for it
+    cursor.execute("PRAGMA table_info(event_archive)")
+    if 'first_event_day' not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE event_archive ADD COLUMN first_event_day INTEGER")
+
+
+######################### CONTACT SEARCH #################################
+
+# Function to create the FTS5 shadow table of contact names and the triggers keeping it in sync
+def setup_contacts_search(cursor):
+    """Create contacts_fts (external content on contacts.name) and fill it on first run."""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'contacts_fts'")
+    exists = cursor.fetchone() is not None
+
+    # prefix='1 2 3' keeps ready-made indexes for the short prefixes typed on the letter wheel
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5(
+            name,
+            content='contacts',
+            content_rowid='id',
+            prefix='1 2 3'
+        )
+    ''')
+
+    # Keep the shadow table in step with every insert, delete and rename on contacts
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS contacts_fts_insert AFTER INSERT ON contacts BEGIN
+            INSERT INTO contacts_fts(rowid, name) VALUES (new.id, new.name);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS contacts_fts_delete AFTER DELETE ON contacts BEGIN
+            INSERT INTO contacts_fts(contacts_fts, rowid, name) VALUES ('delete', old.id, old.name);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS contacts_fts_update AFTER UPDATE OF name ON contacts BEGIN
+            INSERT INTO contacts_fts(contacts_fts, rowid, name) VALUES ('delete', old.id, old.name);
+            INSERT INTO contacts_fts(rowid, name) VALUES (new.id, new.name);
+        END
+    ''')
+
+    if not exists:
+        cursor.execute("INSERT INTO contacts_fts(contacts_fts) VALUES ('rebuild')")
+
+
+# Function to turn the text typed on the letter wheel into an FTS5 prefix query
+def build_prefix_query(text):
+    """Turn 'jo sm' into '"jo"* "sm"*' so every typed word matches the start of a name word."""
+    words = text.split()
+    return ' '.join('"' + word.replace('"', '""') + '"*' for word in words)
+
+
+# Function to look up contacts whose name words start with the typed prefix
+def search_contacts(text, limit=20, db_file=DB_FILE):
+    """Return up to `limit` (id, name) tuples matching the prefix, sorted by name."""
+    query = build_prefix_query(text)
+    if not query:
+        return []
+
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+
+    # No ORDER BY in SQL: a one-letter prefix can match most of the table, so only the
+    # first `limit` hits are read from the index and the short list is sorted here
+    cursor.execute('''
+        SELECT rowid, name
+        FROM contacts_fts
+        WHERE contacts_fts MATCH ?
+        LIMIT ?
+    ''', (query, limit))
+
+    contacts = cursor.fetchall()
+    conn.close()
+
+    contacts.sort(key=lambda x: x[1])
+    return contacts
+
+
+######################### CONTACT CARD #################################
+
+# Function to fetch the details shown at the top of a contact's card
+def get_contact_details(contact_id, db_file=DB_FILE):
+    """Return (id, name, phone, email, frequency, last_contact_day) for one contact, or None."""
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        SELECT id, name, phone, email, frequency, last_contact_day
+        FROM contacts
+        WHERE id = ?
+    ''', (contact_id,))
+
+    contact = cursor.fetchone()
+    conn.close()
+    return contact
+
+
+# Function to fetch one page of a contact's event history using keyset pagination
+def get_event_page(contact_id, page_size, after=None, before=None, db_file=DB_FILE):
+    """Return up to page_size (seq, event_day, event_type, rating) rows, newest first.
+
+    after/before are the (seq, event_day) of the last/first row of the page on screen, so
+    the next or previous page starts from that key position instead of an OFFSET.
+    """
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+
+    # events is clustered on (contact_id, event_day DESC, seq DESC), so each page is one key range
+    if before is not None:
+        # Previous page: walk the key the other way from the first row shown, then flip
+        cursor.execute('''
+            SELECT e.seq, e.event_day, t.name, e.rating
+            FROM events e
+            LEFT JOIN event_types t ON t.id = e.event_type_id
+            WHERE e.contact_id = ? AND (e.event_day, e.seq) > (?, ?)
+            ORDER BY e.event_day ASC, e.seq ASC
+            LIMIT ?
+        ''', (contact_id, before[1], before[0], page_size))
+        events = cursor.fetchall()
+        events.reverse()
+    elif after is not None:
+        cursor.execute('''
+            SELECT e.seq, e.event_day, t.name, e.rating
+            FROM events e
+            LEFT JOIN event_types t ON t.id = e.event_type_id
+            WHERE e.contact_id = ? AND (e.event_day, e.seq) < (?, ?)
+            ORDER BY e.event_day DESC, e.seq DESC
+            LIMIT ?
+        ''', (contact_id, after[1], after[0], page_size))
+        events = cursor.fetchall()
+    else:
+        cursor.execute('''
+            SELECT e.seq, e.event_day, t.name, e.rating
+            FROM events e
+            LEFT JOIN event_types t ON t.id = e.event_type_id
+            WHERE e.contact_id = ?
+            ORDER BY e.event_day DESC, e.seq DESC
+            LIMIT ?
+        ''', (contact_id, page_size))
+        events = cursor.fetchall()
+
+    conn.close()
+    return events
+
+
+######################### DUE DATES AND SNOOZE #################################
+
+# The day a contact next becomes CONTACTABLE: last contact + frequency, pushed back by any snooze
+DUE_DAY_EXPRESSION = '''
+    CASE WHEN snooze_until_day > last_contact_day + frequency
+         THEN snooze_until_day
+         ELSE last_contact_day + frequency
+    END
+'''
+
+
+# Function to add the due_day/snooze_until_day columns, their index and the triggers maintaining due_day
+def setup_due_dates(cursor):
+    """Add due_day and snooze_until_day to contacts and keep due_day derived from the other columns."""
+    cursor.execute("PRAGMA table_info(contacts)")
+    columns = [row[1] for row in cursor.fetchall()]
+
+    if 'snooze_until_day' not in columns:
+        cursor.execute("ALTER TABLE contacts ADD COLUMN snooze_until_day INTEGER")
+    if 'due_day' not in columns:
+        cursor.execute("ALTER TABLE contacts ADD COLUMN due_day INTEGER")
+        cursor.execute(f"UPDATE contacts SET due_day = {DUE_DAY_EXPRESSION}")
+
+    # One index answers both "is it due yet" and "is it still snoozed"
+    cursor.execute("CREATE INDEX IF NOT EXISTS contacts_due_day ON contacts(due_day)")
+
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS contacts_due_day_insert AFTER INSERT ON contacts BEGIN
+            UPDATE contacts SET due_day = {DUE_DAY_EXPRESSION} WHERE id = new.id;
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS contacts_due_day_update
+        AFTER UPDATE OF last_contact_day, frequency, snooze_until_day ON contacts BEGIN
+            UPDATE contacts SET due_day = {DUE_DAY_EXPRESSION} WHERE id = new.id;
+        END
+    ''')
+
+
+# Function to snooze a contact so they drop out of the CONTACTABLE list for a while
+def record_snooze(cursor, contact_id, days):
+    """Set snooze_until_day to `days` days from today and return it, in the caller's transaction."""
+    snooze_until_day = today_day() + days
+
+    cursor.execute('''
+        UPDATE contacts
+        SET snooze_until_day = ?
+        WHERE id = ?
+    ''', (snooze_until_day, contact_id))
+    return snooze_until_day
+
+
+# Function to pick one CONTACTABLE contact that is not already in today's plan
+def select_replacement_contact(cursor, exclude_ids, today):
+    """Return a random (id, name, frequency, last_contact_day) that is due and not excluded, or None."""
+    placeholders = ', '.join('?' for _ in exclude_ids)
+    cursor.execute(f'''
+        SELECT id, name, frequency, last_contact_day
+        FROM contacts
+        WHERE due_day <= ? AND id NOT IN ({placeholders})
+        ORDER BY random()
+        LIMIT 1
+    ''', (today, *exclude_ids))
+    return cursor.fetchone()
+
+
+######################### TODAY AND EVENT LOGGING #################################
+
+# Function to list every contact, unsorted
+def get_all_contacts(db_file=DB_FILE):
+    """Return (id, name) for every contact."""
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT id, name FROM contacts")
+    contacts = cursor.fetchall()
+
+    conn.close()
+    return contacts
+
+
+# Function to retrieve the CONTACTABLE list
+def get_contactable_contacts(db_file=DB_FILE):
+    """Return (id, name, frequency, last_contact_day) for every contact due today or earlier."""
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+
+    # due_day is last_contact_day + frequency (or snooze_until_day, if later), so one integer index range covers both
+    cursor.execute('''
+        SELECT id, name, frequency, last_contact_day
+        FROM contacts
+        WHERE due_day <= ?
+    ''', (today_day(),))
+
+    contacts = cursor.fetchall()
+    conn.close()
+    return contacts
+
+
+# Function to randomly select today's contacts from the CONTACTABLE list
+def suggest_contacts_for_today(eligible_contacts, count=3):
+    """Return `count` random contacts from eligible_contacts, or all of them if there are fewer."""
+    if len(eligible_contacts) <= count:
+        return eligible_contacts
+    return random.sample(eligible_contacts, count)
+
+
+# Function to log an event and make its day the contact's last contact, in one transaction
+def log_event_to_db(contact_id, event_type, rating, db_file=DB_FILE):
+    """Insert today's event for the contact and return the day it was logged on."""
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+
+    today = today_day()
+    record_event(cursor, contact_id, event_type, rating, today)
+
+    conn.commit()
+    conn.close()
+    return today
+
+
+# Function to mark a contact as contacted today without logging an event
+def mark_contact_as_done(contact_id, db_file=DB_FILE):
+    """Set the contact's last_contact_day to today and return it."""
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+
+    today = today_day()
+    record_contact_done(cursor, contact_id, today)
+
+    conn.commit()
+    conn.close()
+    return today
+
+
+# Function to add an event and update the contact using the caller's cursor (and transaction)
+def record_event(cursor, contact_id, event_type, rating, day):
+    insert_event(cursor, contact_id, day, event_type, rating)
+    record_contact_done(cursor, contact_id, day)
+
+
+# Function to set a contact's last_contact_day using the caller's cursor (and transaction)
+def record_contact_done(cursor, contact_id, day):
+    # Primary-key update, so namesakes are untouched
+    cursor.execute('''
+        UPDATE contacts
+        SET last_contact_day = ?
+        WHERE id = ?
+    ''', (day, contact_id))
+
+
+# Function to check one incoming event (API, import) and put it in the form insert_events takes
+def validate_event(contact_id, event_type, event_date=None, rating=None):
+    """Return (contact_id, event_day, event_type, rating); raises ValueError describing the problem.
+
+    event_date may be 'YYYY-MM-DD', an epoch day or None for today. event_type is matched to
+    EVENT_TYPES ignoring case, and rating must be 1-5 or None. Whether the contact exists is
+    left to the caller, which can check a whole batch at once.
+    """
+    if isinstance(contact_id, bool) or not isinstance(contact_id, int):
+        raise ValueError(f"contact id must be an integer, not {contact_id!r}")
+
+    types = {name.lower(): name for name in EVENT_TYPES}
+    if not isinstance(event_type, str) or event_type.strip().lower() not in types:
+        raise ValueError(f"event type must be one of {', '.join(EVENT_TYPES)}, not {event_type!r}")
+
+    if event_date is None or event_date == '':
+        event_day = today_day()
+    elif isinstance(event_date, int) and not isinstance(event_date, bool):
+        event_day = event_date
+    elif isinstance(event_date, str):
+        try:
+            event_day = text_to_day(event_date.strip())
+        except ValueError:
+            raise ValueError(f"date must be YYYY-MM-DD, not {event_date!r}") from None
+    else:
+        raise ValueError(f"date must be YYYY-MM-DD, not {event_date!r}")
+    if event_day > today_day():
+        raise ValueError(f"date {day_to_text(event_day)} is in the future")
+
+    if rating is not None and (isinstance(rating, bool) or not isinstance(rating, int) or not 1 <= rating <= 5):
+        raise ValueError(f"rating must be 1-5 or empty, not {rating!r}")
+
+    return contact_id, event_day, types[event_type.strip().lower()], rating
+
+
+# Function to add many events at once using the caller's cursor (and transaction)
+def insert_events(cursor, events):
+    """Insert (contact_id, event_day, event_type, rating) rows and return how many were added.
+
+    Each contact's last_contact_day moves forward to their newest event in the batch (never
+    back, so backfilling old history leaves it alone), in one statement for the whole batch.
+    """
+    events = list(events)
+    cursor.executemany("INSERT OR IGNORE INTO event_types (name) VALUES (?)",
+                       [(event_type,) for event_type in {event[2] for event in events}])
+
+    # seq is worked out per row, so events for the same contact and day in one batch still get 1, 2, 3...
+    cursor.executemany('''
+        INSERT INTO events (contact_id, event_day, seq, event_type_id, rating)
+        VALUES (
+            ?1, ?2,
+            (SELECT coalesce(max(seq), 0) + 1 FROM events WHERE contact_id = ?1 AND event_day = ?2),
+            (SELECT id FROM event_types WHERE name = ?3),
+            ?4
+        )
+    ''', events)
+
+    latest = {}
+    for contact_id, event_day, _, _ in events:
+        if event_day > latest.get(contact_id, event_day - 1):
+            latest[contact_id] = event_day
+    cursor.execute('''
+        UPDATE contacts
+        SET last_contact_day = batch.event_day
+        FROM (SELECT json_extract(value, '$[0]') AS contact_id, json_extract(value, '$[1]') AS event_day
+              FROM json_each(?)) AS batch
+        WHERE contacts.id = batch.contact_id
+          AND (contacts.last_contact_day IS NULL OR contacts.last_contact_day < batch.event_day)
+    ''', (json.dumps(list(latest.items())),))
+    return len(events)
+
+
+######################### DUE-DATE FORECAST #################################
+
+# Function to create the per-day histogram of due dates and the triggers that keep it current
+def setup_due_day_counts(cursor):
+    """Create due_day_counts (contacts falling due on each day), maintained as due_day changes."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS due_day_counts (
+            due_day INTEGER PRIMARY KEY,
+            contact_count INTEGER NOT NULL
+        )
+    ''')
+
+    cursor.execute("SELECT count(*) FROM due_day_counts")
+    if cursor.fetchone()[0] == 0:
+        cursor.execute('''
+            INSERT INTO due_day_counts (due_day, contact_count)
+            SELECT due_day, count(*) FROM contacts WHERE due_day IS NOT NULL GROUP BY due_day
+        ''')
+
+    # due_day itself is set by the contacts_due_day_* triggers, whose UPDATE fires these in turn.
+    # Empty buckets are deleted so the table only ever holds days someone is due on.
+    increment = '''
+        INSERT INTO due_day_counts (due_day, contact_count)
+        SELECT new.due_day, 1 WHERE new.due_day IS NOT NULL
+        ON CONFLICT (due_day) DO UPDATE SET contact_count = contact_count + 1;
+    '''
+    decrement = '''
+        UPDATE due_day_counts SET contact_count = contact_count - 1 WHERE due_day = old.due_day;
+        DELETE FROM due_day_counts WHERE due_day = old.due_day AND contact_count <= 0;
+    '''
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS due_day_counts_insert AFTER INSERT ON contacts BEGIN {increment} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS due_day_counts_delete AFTER DELETE ON contacts BEGIN {decrement} END")
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS due_day_counts_update AFTER UPDATE OF due_day ON contacts
+        WHEN old.due_day IS NOT new.due_day BEGIN {decrement} {increment} END
+    ''')
+
+
+# Function to read how many contacts fall due on each of the coming days
+def get_due_forecast(days, db_file=DB_FILE):
+    """Return a list of `days` counts starting today; today's count includes everyone overdue."""
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+
+    today = today_day()
+    forecast = [0] * days
+
+    # A primary-key range over the histogram, never a pass over contacts
+    cursor.execute('''
+        SELECT max(due_day - ?, 0), sum(contact_count)
+        FROM due_day_counts
+        WHERE due_day < ?
+        GROUP BY 1
+    ''', (today, today + days))
+    for offset, count in cursor.fetchall():
+        forecast[offset] = count
+
+    conn.close()
+    return forecast
+
+
+######################### FREQUENCY #################################
+
+# Function to change one contact's frequency; the due_day trigger runs in the caller's transaction
+def record_contact_frequency(cursor, contact_id, frequency):
+    """Update a contact's frequency (days between contacts) and return their new due_day."""
+    cursor.execute('''
+        UPDATE contacts
+        SET frequency = ?
+        WHERE id = ?
+    ''', (frequency, contact_id))
+
+    cursor.execute("SELECT due_day FROM contacts WHERE id = ?", (contact_id,))
+    return cursor.fetchone()[0]
+
+
+# Function to re-tune every contact sharing a frequency in one statement
+def record_bulk_frequency(cursor, frequency, current_frequency):
+    """Move all contacts with current_frequency to frequency; returns how many rows changed."""
+    cursor.execute('''
+        UPDATE contacts
+        SET frequency = ?
+        WHERE frequency = ?
+    ''', (frequency, current_frequency))
+    return cursor.rowcount
+
+
+# Function to re-read a handful of contacts (e.g. today's plan) after they were edited
+def select_contacts_by_ids(cursor, contact_ids):
+    """Return {id: (id, name, frequency, last_contact_day, due_day)} for the given ids."""
+    placeholders = ', '.join('?' for _ in contact_ids)
+    cursor.execute(f'''
+        SELECT id, name, frequency, last_contact_day, due_day
+        FROM contacts
+        WHERE id IN ({placeholders})
+    ''', tuple(contact_ids))
+    return {row[0]: row for row in cursor.fetchall()}
+
+
+######################### NAME LOOKUP #################################
+
+# How names are compared when a name (not an id) is all we have, e.g. when importing
+NAME_KEY_EXPRESSION = "lower(trim(name))"
+
+
+# Function to index contacts on their normalised name
+def setup_name_index(cursor):
+    """Create the expression index that name lookups on NAME_KEY_EXPRESSION (e.g. import_events) search."""
+    # Not UNIQUE: two contacts can share a name, which is why everything else works on ids
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS contacts_name_key ON contacts({NAME_KEY_EXPRESSION})")
+
+
+######################### RELATIONSHIP STATS #################################
+
+# Function to create the table relationship_analytics caches its per-contact stats in
+def setup_contact_stats(cursor):
+    """Create contact_stats plus a dirty list that triggers fill whenever a contact's history changes."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS contact_stats (
+            contact_id INTEGER PRIMARY KEY,
+            event_count INTEGER NOT NULL,
+            last_event_day INTEGER,
+            mean_interval REAL,
+            mean_rating REAL,
+            rating_trend REAL,
+            interval_drift REAL
+        )
+    ''')
+    cursor.execute("CREATE TABLE IF NOT EXISTS contact_stats_dirty (contact_id INTEGER PRIMARY KEY)")
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS contact_stats_event_insert AFTER INSERT ON events BEGIN
+            INSERT OR IGNORE INTO contact_stats_dirty (contact_id) VALUES (new.contact_id);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS contact_stats_event_delete AFTER DELETE ON events BEGIN
+            INSERT OR IGNORE INTO contact_stats_dirty (contact_id) VALUES (old.contact_id);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS contact_stats_frequency_update AFTER UPDATE OF frequency ON contacts BEGIN
+            INSERT OR IGNORE INTO contact_stats_dirty (contact_id) VALUES (new.id);
+        END
+    ''')
+
+
+# Function to create the table adaptive_frequency leaves its suggested frequencies in
+def setup_frequency_proposals(cursor):
+    """Create frequency_proposals: one suggested frequency per contact, with the frequency it replaces."""
+    # frequency is the value the proposal was computed against, so a later manual edit wins
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS frequency_proposals (
+            contact_id INTEGER PRIMARY KEY,
+            frequency INTEGER,
+            proposed_frequency INTEGER NOT NULL,
+            computed_day INTEGER NOT NULL
+        )
+    ''')
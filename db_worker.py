@@ -0,0 +1,57 @@
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+from contacts_db import DB_FILE
+
+# One connection, owned by one thread, with a queue in front of it. The UI's writes (event
+# logging, snoozes, frequency edits) and the HTTP API hand the worker a job instead of opening
+# their own connection, so they never contend with each other for the lock and each job is one
+# transaction. The nightly batch jobs (stats, adaptive frequencies, archiving, backups) still
+# use connections of their own; see the DATABASE WORKER section of the UI.
+# A job is a function taking a cursor; submit() returns a concurrent.futures.Future, which
+# asyncio code can await with asyncio.wrap_future().
+
+
+class DatabaseWorker:
+    def __init__(self, db_file=DB_FILE):
+        self.db_file = db_file
+        self.jobs = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            future, function, args = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = function(cursor, *args)
+                conn.commit()
+            except BaseException as error:
+                conn.rollback()
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        conn.close()
+
+    def submit(self, function, *args):
+        """Queue function(cursor, *args) to run in its own transaction; returns a Future."""
+        future = Future()
+        self.jobs.put((future, function, args))
+        return future
+
+    def call(self, function, *args):
+        """Run function(cursor, *args) on the worker and wait for its result."""
+        return self.submit(function, *args).result()
+
+    def close(self):
+        """Finish the queued jobs, then close the connection."""
+        self.jobs.put(None)
+        self.thread.join()
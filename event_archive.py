@@ -0,0 +1,146 @@
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import time
+from datetime import timedelta
+
+from contacts_db import DB_FILE, EPOCH, today_day
+
+# Keeps the events table to recent history. Events older than the horizon are rolled up into
+# event_archive (one row per contact, month and event type, with counts and rating sums) and
+# deleted, so history queries only ever walk a bounded table. relationship_analytics and
+# relationship_report fold the archived totals back into each contact's event count, mean
+# interval and mean rating, so archiving doesn't change them. The horizon is rounded down to
+# the start of a month, so a month is archived whole; rolling up more events into a month that
+# has a row adds to it.
+#
+# Work is done a range of contact ids at a time, each range in its own transaction, so the
+# UI never waits long for the write lock. The freed pages are then handed back to the
+# filesystem with incremental vacuum, again a few at a time. That needs the database in
+# auto_vacuum=INCREMENTAL mode, which takes a full VACUUM to switch on; it is a one-off done
+# offline with `python event_archive.py --enable-incremental-vacuum` while the UI is stopped.
+# Until then the nightly job leaves the freed pages for later inserts to reuse.
+
+log = logging.getLogger(__name__)
+
+ARCHIVE_HORIZON_DAYS = 2 * 365  # Events older than about this are archived
+ARCHIVE_BATCH_CONTACTS = 2000  # Contact ids rolled up per transaction
+VACUUM_PAGES = 256  # Pages freed per incremental_vacuum step
+VACUUM_PAUSE = 0.02  # Seconds between vacuum steps
+UNKNOWN_EVENT_TYPE = 0  # event_type_id archived for events that had no type
+AUTO_VACUUM_INCREMENTAL = 2  # PRAGMA auto_vacuum's value for INCREMENTAL
+
+# The epoch day of the first of the month an events.event_day falls in
+MONTH_DAY_EXPRESSION = "CAST(julianday(date(event_day * 86400, 'unixepoch', 'start of month')) - 2440587.5 AS INTEGER)"
+
+
+# Function to work out the first day that is kept in the events table
+def archive_cutoff_day(horizon_days=ARCHIVE_HORIZON_DAYS, today=None):
+    """Return the epoch day of the first of the month horizon_days before today."""
+    today = today_day() if today is None else today
+    first_of_month = (EPOCH + timedelta(days=today - horizon_days)).replace(day=1)
+    return (first_of_month - EPOCH).days
+
+
+# Function to switch an existing database to incremental auto-vacuum; a full VACUUM, so only run it offline
+def enable_incremental_vacuum(db_file=DB_FILE):
+    """Return True if the database had to be converted."""
+    conn = sqlite3.connect(db_file, isolation_level=None)
+    try:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == AUTO_VACUUM_INCREMENTAL:
+            return False
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")  # auto_vacuum only takes effect on a database rebuilt after setting it
+        return True
+    finally:
+        conn.close()
+
+
+# Function to roll up and delete one range of contacts' old events, atomically
+def archive_contact_range(cursor, first_id, last_id, cutoff_day):
+    """Return how many events were moved into event_archive."""
+    cursor.execute(f'''
+        INSERT INTO event_archive (contact_id, month_day, event_type_id, event_count,
+                                   rating_count, rating_sum, last_event_day, first_event_day)
+        SELECT contact_id, {MONTH_DAY_EXPRESSION}, coalesce(event_type_id, ?),
+               count(*), count(rating), coalesce(sum(rating), 0), max(event_day), min(event_day)
+        FROM events
+        WHERE contact_id BETWEEN ? AND ? AND event_day < ?
+        GROUP BY 1, 2, 3
+        ON CONFLICT (contact_id, month_day, event_type_id) DO UPDATE SET
+            event_count = event_count + excluded.event_count,
+            rating_count = rating_count + excluded.rating_count,
+            rating_sum = rating_sum + excluded.rating_sum,
+            last_event_day = max(last_event_day, excluded.last_event_day),
+            first_event_day = min(coalesce(first_event_day, month_day), excluded.first_event_day)
+    ''', (UNKNOWN_EVENT_TYPE, first_id, last_id, cutoff_day))
+
+    cursor.execute('''
+        DELETE FROM events
+        WHERE contact_id BETWEEN ? AND ? AND event_day < ?
+    ''', (first_id, last_id, cutoff_day))
+    return cursor.rowcount
+
+
+# Function to give freed pages back to the filesystem a few at a time
+def vacuum_free_pages(conn):
+    """Return the number of pages released."""
+    released = 0
+    while True:
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if free_pages == 0:
+            return released
+        conn.execute(f"PRAGMA incremental_vacuum({VACUUM_PAGES})").fetchall()
+        released += min(free_pages, VACUUM_PAGES)
+        time.sleep(VACUUM_PAUSE)
+
+
+# Function to run the archival job
+def archive_old_events(horizon_days=ARCHIVE_HORIZON_DAYS, db_file=DB_FILE):
+    """Archive every event before the cutoff, then vacuum. Returns (events archived, pages released)."""
+    cutoff_day = archive_cutoff_day(horizon_days)
+    conn = sqlite3.connect(db_file, isolation_level=None)  # Transactions are managed explicitly below
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT min(id), max(id) FROM contacts")
+    first_id, last_id = cursor.fetchone()
+    if first_id is None:
+        conn.close()
+        return 0, 0
+
+    archived = 0
+    for range_start in range(first_id, last_id + 1, ARCHIVE_BATCH_CONTACTS):
+        cursor.execute("BEGIN IMMEDIATE")
+        archived += archive_contact_range(cursor, range_start, range_start + ARCHIVE_BATCH_CONTACTS - 1, cutoff_day)
+        cursor.execute("COMMIT")
+
+    if cursor.execute("PRAGMA auto_vacuum").fetchone()[0] == AUTO_VACUUM_INCREMENTAL:
+        released = vacuum_free_pages(conn)
+    else:
+        released = 0
+        if archived:
+            log.info("Archived %d events; run event_archive.py --enable-incremental-vacuum offline to release their pages",
+                     archived)
+    conn.close()
+    return archived, released
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive old events, or prepare the database for archiving.")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--enable-incremental-vacuum", action="store_true",
+                        help="switch the database to incremental auto-vacuum (a full VACUUM; stop the UI first)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        sys.exit(f"No such database: {args.db}")
+    if args.enable_incremental_vacuum:
+        start = time.monotonic()
+        if enable_incremental_vacuum(args.db):
+            print(f"Switched {args.db} to incremental auto-vacuum in {time.monotonic() - start:.1f}s")
+        else:
+            print(f"{args.db} already uses incremental auto-vacuum")
+    else:
+        archived, released = archive_old_events(db_file=args.db)
+        print(f"Archived {archived} events and released {released} pages")
@@ -0,0 +1,202 @@
+import argparse
+import os
+import random
+import sqlite3
+import time
+
+from contacts_db import setup_database, today_day
+
+# Builds synthetic contacts_events.db files for scaling tests. The tables start out exactly as
+# the shipped database has them and setup_database() migrates them, so a generated file has
+# the same schema, indexes and triggers as a real one. The same seed and sizes always give
+# the same rows; dates are relative to `today` so a fixture's due list doesn't drift.
+
+FIXTURE_DIR = 'fixtures'
+
+# The tables as they are in the contacts_events.db the project started from
+BASE_SCHEMA = '''
+    CREATE TABLE contacts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        phone TEXT,
+        email TEXT
+    , rating REAL DEFAULT 0, last_contact_date TEXT, frequency INTEGER);
+    CREATE TABLE events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        contact_id INTEGER,
+        event_type TEXT,
+        event_date TEXT,
+        rating INTEGER
+    );
+'''
+
+FIRST_NAMES = [
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+    "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Chris", "Karen",
+    "Daniel", "Lisa", "Matthew", "Nancy", "Anthony", "Betty", "Mark", "Sandra", "Steven", "Ashley",
+    "Andrew", "Emily", "Joshua", "Michelle", "Kevin", "Amanda", "Brian", "Melissa", "Aidan", "Allison",
+    "Zoe", "Mateo", "Priya", "Wei", "Olga", "Kwame", "Siobhan", "Hiroshi", "Fatima", "Lars",
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+    "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+    "Lee", "Perez", "Thompson", "White", "Harris", "Sanchez", "Clark", "Ramirez", "Lewis", "Robinson",
+    "Walker", "Young", "Allen", "King", "Wright", "Scott", "Torres", "Nguyen", "Hill", "Flores",
+    "O'Brien", "Van der Berg", "Okafor", "Kowalski", "Tanaka", "Patel", "Zanders", "Drechsler", "Pike", "Cox",
+]
+
+# (value, weight) tables for the columns people fill in by hand
+FREQUENCY_WEIGHTS = [(7, 4), (14, 8), (30, 20), (60, 15), (90, 15), (180, 13), (365, 20), (None, 5)]
+EVENT_TYPE_WEIGHTS = [("Email", 45), ("Phone Call", 30), ("In-person", 25)]
+RATING_WEIGHTS = [(1, 4), (2, 8), (3, 26), (4, 34), (5, 18), (None, 10)]
+
+HISTORY_DAYS = 10 * 365  # No event is generated further back than this
+EVENT_TAIL = 1.2  # Pareto shape for events per contact: most have a few, some have hundreds
+BATCH_SIZE = 50000  # Rows per executemany call
+
+
+# Function to make a weighted chooser that is cheap to call millions of times
+def weighted_chooser(rng, weights):
+    values = [value for value, _ in weights]
+    cumulative = []
+    total = 0
+    for _, weight in weights:
+        total += weight
+        cumulative.append(total)
+    return lambda: rng.choices(values, cum_weights=cumulative)[0]
+
+
+# Function to generate (id, name, phone, email, frequency, last_contact_day) rows
+def generate_contacts(rng, contact_count, today):
+    frequency_of = weighted_chooser(rng, FREQUENCY_WEIGHTS)
+    for contact_id in range(1, contact_count + 1):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        phone = f"555-{rng.randrange(10000):04d}" if rng.random() < 0.6 else None
+        email = f"{first}.{last}{contact_id}@example.com".lower().replace(' ', '').replace("'", '') if rng.random() < 0.7 else None
+        frequency = frequency_of()
+        # Overwritten from the events for contacts that have any; the rest are partly never contacted
+        last_contact_day = today - rng.randrange(2 * (frequency or 365)) if rng.random() < 0.8 else None
+        yield contact_id, f"{first} {last}", phone, email, frequency, last_contact_day
+
+
+# Function to split event_count events across contacts with a heavy tail
+def events_per_contact(rng, contact_count, event_count):
+    weights = [rng.paretovariate(EVENT_TAIL) for _ in range(contact_count)]
+    scale = event_count / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    # Hand the rounding remainder out one event at a time so the total is exact
+    for contact_index in rng.sample(range(contact_count), min(contact_count, event_count - sum(counts))):
+        counts[contact_index] += 1
+    return counts
+
+
+# Function to generate one contact's events, newest first, as (contact_id, day, seq, type_id, rating)
+def generate_contact_events(rng, contact_id, count, frequency, today, type_of, rating_of, type_ids):
+    # Contacts with long histories are seen more often than their frequency says
+    gap = max(1, min(frequency or 90, HISTORY_DAYS // (count + 1)))
+    day = today - rng.randrange(2 * (frequency or 90))  # About half end up overdue
+    previous_day, seq = None, 0
+    for _ in range(count):
+        seq = seq + 1 if day == previous_day else 1
+        yield contact_id, day, seq, type_ids[type_of()], rating_of()
+        previous_day = day
+        # Real cadence wanders around the gap, lognormally with a mean of one gap
+        day -= round(gap * rng.lognormvariate(-0.18, 0.6))
+        if today - day > HISTORY_DAYS:
+            break
+
+
+# Function to write a generated database; rows go in by primary key, in large batches
+def generate_database(path, contact_count, event_count, seed=0, today=None):
+    """Create a database at `path` with contact_count contacts and about event_count events.
+
+    Contacts with long histories are cut off at HISTORY_DAYS, so the events table can end
+    up a little smaller than asked. Returns (contacts, events) actually written.
+    """
+    rng = random.Random(seed)
+    today = today_day() if today is None else today
+    temp_path = path + '.tmp'
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+    conn = sqlite3.connect(temp_path)
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")  # Free to set before any table exists, unlike later
+    cursor.executescript(BASE_SCHEMA)
+    conn.close()
+    setup_database(temp_path)
+
+    conn = sqlite3.connect(temp_path)
+    cursor = conn.cursor()
+    # Nothing is at risk while the file is still a temp file, so skip the journal and fsyncs
+    cursor.execute("PRAGMA journal_mode = OFF")
+    cursor.execute("PRAGMA synchronous = OFF")
+
+    frequencies = {}
+    contacts = generate_contacts(rng, contact_count, today)
+    while True:
+        batch = [row for _, row in zip(range(BATCH_SIZE), contacts)]
+        if not batch:
+            break
+        cursor.executemany('''
+            INSERT INTO contacts (id, name, phone, email, frequency, last_contact_day)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', batch)
+        frequencies.update((row[0], row[4]) for row in batch)
+
+    cursor.execute("SELECT name, id FROM event_types")
+    type_ids = dict(cursor.fetchall())
+    type_of = weighted_chooser(rng, EVENT_TYPE_WEIGHTS)
+    rating_of = weighted_chooser(rng, RATING_WEIGHTS)
+
+    events_written = 0
+    batch = []
+    for contact_id, count in enumerate(events_per_contact(rng, contact_count, event_count), start=1):
+        batch.extend(generate_contact_events(rng, contact_id, count, frequencies[contact_id], today,
+                                             type_of, rating_of, type_ids))
+        if len(batch) >= BATCH_SIZE:
+            cursor.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?)", batch)
+            events_written += len(batch)
+            batch = []
+    cursor.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?)", batch)
+    events_written += len(batch)
+
+    # Same invariant the app keeps: a contact's last contact is their newest event
+    cursor.execute('''
+        UPDATE contacts
+        SET last_contact_day = latest.event_day
+        FROM (SELECT contact_id, max(event_day) AS event_day FROM events GROUP BY contact_id) AS latest
+        WHERE latest.contact_id = contacts.id
+    ''')
+
+    conn.commit()
+    cursor.execute("PRAGMA journal_mode = WAL")
+    cursor.execute("ANALYZE")
+    conn.close()
+
+    os.replace(temp_path, path)
+    return contact_count, events_written
+
+
+# Function to get a shared fixture database, generating it the first time it is asked for
+def get_fixture(contact_count, event_count, seed=0, today=None, fixture_dir=FIXTURE_DIR):
+    """Return the path of fixtures/contacts_<n>_events_<m>_seed_<s>.db, creating it if missing."""
+    os.makedirs(fixture_dir, exist_ok=True)
+    path = os.path.join(fixture_dir, f"contacts_{contact_count}_events_{event_count}_seed_{seed}.db")
+    if not os.path.exists(path):
+        generate_database(path, contact_count, event_count, seed, today)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic contacts_events.db for scaling tests.")
+    parser.add_argument("path", help="database file to write (replaced if it exists)")
+    parser.add_argument("--contacts", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--today", type=int, help="epoch day the dates are relative to (default: today)")
+    args = parser.parse_args()
+
+    start = time.monotonic()
+    contacts, events = generate_database(args.path, args.contacts, args.events, args.seed, args.today)
+    print(f"Wrote {contacts} contacts and {events} events to {args.path} in {time.monotonic() - start:.1f}s")
@@ -0,0 +1,161 @@
+import argparse
+import csv
+import io
+import json
+import os
+import sqlite3
+import sys
+import time
+
+from contacts_db import DB_FILE, NAME_KEY_EXPRESSION, insert_events, validate_event
+
+# Logs a whole file of past interactions at once, e.g. a phone's call log or a spreadsheet kept
+# while the device was away. Each record has a contact (an id, or a name matched ignoring case
+# and surrounding spaces), an event type, a date and an optional rating:
+#
+#   {"contact": "Jane Smith", "type": "Phone Call", "date": "2024-03-02", "rating": 4}
+#   contact,type,date,rating            (CSV, with this header row)
+#
+# Every row is checked before anything is written, then all of them go in as one transaction,
+# and each contact's last_contact_day moves forward to their newest imported event.
+
+FIELDS = ('contact', 'type', 'date', 'rating')
+
+
+# Function to read records from a JSONL or CSV stream
+def read_records(stream, file_format):
+    """Return [(line number, record)]; a line that isn't valid JSON gives its error as the record."""
+    records = []
+    if file_format == 'csv':
+        rows = csv.reader(stream)
+        header = [name.strip().lower() for name in next(rows, FIELDS)]
+        for line_number, row in enumerate(rows, start=2):  # The header is line 1
+            if any(row):
+                records.append((line_number, dict(zip(header, row))))
+    else:
+        for line_number, line in enumerate(stream, start=1):
+            if line.strip():
+                try:
+                    records.append((line_number, json.loads(line)))
+                except json.JSONDecodeError as error:
+                    records.append((line_number, error))
+    return records
+
+
+# Function to resolve every contact named in the file with one query on the name index
+def resolve_contact_names(cursor, names):
+    """Return {name: [ids]} for the given names, matched on the normalised name."""
+    cursor.execute(f'''
+        SELECT wanted.value, contacts.id
+        FROM json_each(?) AS wanted
+        JOIN contacts ON {NAME_KEY_EXPRESSION} = lower(trim(wanted.value))
+    ''', (json.dumps(sorted(names)),))
+    matches = {}
+    for name, contact_id in cursor.fetchall():
+        matches.setdefault(name, []).append(contact_id)
+    return matches
+
+
+# Function to check which of the ids given in the file exist, with one primary-key lookup each
+def existing_contact_ids(cursor, contact_ids):
+    cursor.execute('''
+        SELECT contacts.id
+        FROM json_each(?) AS wanted
+        JOIN contacts ON contacts.id = wanted.value
+    ''', (json.dumps(sorted(contact_ids)),))
+    return {row[0] for row in cursor.fetchall()}
+
+
+# Function to turn raw records into validated insert_events rows
+def prepare_events(cursor, records):
+    """Return (events, errors); errors is a list of (line number, message)."""
+    contacts = [record.get('contact') for _, record in records if isinstance(record, dict)]
+    matches = resolve_contact_names(cursor, {str(contact).strip() for contact in contacts
+                                             if parse_contact_id(contact) is None})
+    known_ids = existing_contact_ids(cursor, {parse_contact_id(contact) for contact in contacts} - {None})
+
+    events, errors = [], []
+    for line_number, record in records:
+        try:
+            if not isinstance(record, dict):
+                raise ValueError(f"not a record: {record}")
+            contact = record.get('contact')
+            contact_id = parse_contact_id(contact)
+            if contact_id is None:
+                ids = matches.get(str(contact).strip(), [])
+                if len(ids) != 1:
+                    raise ValueError(f"{'no' if not ids else len(ids)} contacts named {contact!r}")
+                contact_id = ids[0]
+            elif contact_id not in known_ids:
+                raise ValueError(f"no contact with id {contact_id}")
+
+            rating = record.get('rating')
+            if isinstance(rating, str):
+                try:
+                    rating = int(rating) if rating.strip() else None
+                except ValueError:
+                    raise ValueError(f"rating must be 1-5 or empty, not {rating!r}") from None
+            events.append(validate_event(contact_id, record.get('type'), record.get('date') or None, rating))
+        except ValueError as error:
+            errors.append((line_number, str(error)))
+    return events, errors
+
+
+# Function to read a contact id, as opposed to a name
+def parse_contact_id(contact):
+    if isinstance(contact, int) and not isinstance(contact, bool):
+        return contact
+    if isinstance(contact, str) and contact.strip().isdigit():
+        return int(contact.strip())
+    return None
+
+
+# Function to import a stream of records in one transaction
+def import_events(stream, file_format, db_file=DB_FILE, skip_invalid=False, dry_run=False):
+    """Return (events logged, errors). Nothing is written if there are errors, unless skip_invalid.
+
+    With dry_run nothing is written either way, and the count is of the events that would be.
+    """
+    records = read_records(stream, file_format)
+
+    conn = sqlite3.connect(db_file, timeout=30)  # The UI may be mid-write; wait for it
+    cursor = conn.cursor()
+
+    events, errors = prepare_events(cursor, records)
+    if dry_run or (errors and not skip_invalid):
+        conn.close()
+        return len(events) if dry_run else 0, errors
+
+    logged = insert_events(cursor, events)
+    conn.commit()
+    conn.close()
+    return logged, errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Log a file of contact events in one transaction.")
+    parser.add_argument("path", help="JSONL or CSV file of contact,type,date,rating records ('-' for stdin)")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="default: from the file extension")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--skip-invalid", action="store_true", help="log the valid rows even if some are not")
+    parser.add_argument("--dry-run", action="store_true", help="check the file without writing anything")
+    args = parser.parse_args()
+
+    file_format = args.format or ('csv' if args.path.lower().endswith('.csv') else 'jsonl')
+    start = time.monotonic()
+    if args.path == '-':
+        stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='')
+        logged, errors = import_events(stream, file_format, args.db, args.skip_invalid, args.dry_run)
+    elif not os.path.exists(args.path):
+        sys.exit(f"No such file: {args.path}")
+    else:
+        with open(args.path, encoding='utf-8', newline='') as stream:
+            logged, errors = import_events(stream, file_format, args.db, args.skip_invalid, args.dry_run)
+
+    for line_number, message in errors[:50]:
+        print(f"line {line_number}: {message}")
+    if len(errors) > 50:
+        print(f"... and {len(errors) - 50} more")
+    print(f"{'Would log' if args.dry_run else 'Logged'} {logged} events in {time.monotonic() - start:.1f}s"
+          + (f", {len(errors)} invalid rows" if errors else ""))
+    sys.exit(1 if errors and not args.skip_invalid else 0)
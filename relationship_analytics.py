@@ -0,0 +1,325 @@
+import json
+import random
+import sqlite3
+
+import numpy as np
+
+from contacts_db import DB_FILE, today_day
+from contact_store import database_signature
+
+# Per-contact relationship stats, computed from the events table in whole-array numpy passes.
+# Events that event_archive.py has rolled up into monthly totals still count: event_count,
+# mean_interval and mean_rating cover the archived months too, so archiving leaves them (and
+# the adaptive frequencies learned from them) unchanged. rating_trend is fitted to the live
+# events only, i.e. roughly the last ARCHIVE_HORIZON_DAYS, which is the trend that matters.
+# Event-derived stats are cached in contact_stats and only recomputed for contacts listed in
+# contact_stats_dirty (filled by triggers); the neglect score depends on today's date and is
+# derived from the cached table when it is read.
+
+RATING_TREND_DAYS = 30  # rating_trend is the change in rating per this many days
+DEFAULT_RATING = 3  # Rating assumed for contacts with no rated events when scoring neglect
+
+EVENT_DTYPE = np.dtype([('contact_id', np.int32), ('event_day', np.int32), ('rating', np.int8)])
+CONTACT_DTYPE = np.dtype([('id', np.int32), ('frequency', np.float64), ('last_contact_day', np.float64)])
+ARCHIVE_DTYPE = np.dtype([('contact_id', np.int32), ('event_count', np.int64), ('rating_count', np.int64),
+                          ('rating_sum', np.float64), ('first_event_day', np.float64), ('last_event_day', np.float64)])
+
+stats_cache = None  # {"source": db signature, "day": epoch day, "stats": dict of arrays}
+
+
+# Function to load events into column arrays, grouped by contact with the newest first
+def load_event_columns(cursor, contact_ids=None):
+    """Return a structured array of (contact_id, event_day, rating); rating 0 means unrated."""
+    where = ''
+    params = ()
+    if contact_ids is not None:
+        # One JSON parameter however many ids there are; SQLite caps bound variables per statement
+        where = "WHERE contact_id IN (SELECT value FROM json_each(?))"
+        params = (json.dumps(list(contact_ids)),)
+
+    cursor.execute(f"SELECT count(*) FROM events {where}", params)
+    count = cursor.fetchone()[0]
+
+    # Primary-key order, so SQLite streams the rows without sorting them
+    cursor.execute(f'''
+        SELECT contact_id, event_day, coalesce(rating, 0)
+        FROM events
+        {where}
+        ORDER BY contact_id, event_day DESC, seq DESC
+    ''', params)
+    return np.fromiter(cursor, dtype=EVENT_DTYPE, count=count)
+
+
+# Function to load the contact columns the stats are compared against
+def load_contact_columns(cursor, contact_ids=None):
+    """Return a structured array of (id, frequency, last_contact_day) sorted by id; NULL is NaN."""
+    where = ''
+    params = ()
+    if contact_ids is not None:
+        where = "WHERE id IN (SELECT value FROM json_each(?))"
+        params = (json.dumps(list(contact_ids)),)
+
+    cursor.execute(f"SELECT count(*) FROM contacts {where}", params)
+    count = cursor.fetchone()[0]
+    # numpy turns the None sqlite3 returns for NULL into NaN in the float columns
+    cursor.execute(f'''
+        SELECT id, frequency, last_contact_day
+        FROM contacts
+        {where}
+        ORDER BY id
+    ''', params)
+    return np.fromiter(cursor, dtype=CONTACT_DTYPE, count=count)
+
+
+# Function to load each contact's archived totals from event_archive
+def load_archive_columns(cursor, contact_ids=None):
+    """Return a structured array of per-contact archived totals sorted by contact_id."""
+    where = ''
+    params = ()
+    if contact_ids is not None:
+        where = "WHERE contact_id IN (SELECT value FROM json_each(?))"
+        params = (json.dumps(list(contact_ids)),)
+
+    cursor.execute(f"SELECT count(DISTINCT contact_id) FROM event_archive {where}", params)
+    count = cursor.fetchone()[0]
+    # Rows archived before first_event_day was kept fall back to the first of their month
+    cursor.execute(f'''
+        SELECT contact_id, sum(event_count), sum(rating_count), sum(rating_sum),
+               min(coalesce(first_event_day, month_day)), max(last_event_day)
+        FROM event_archive
+        {where}
+        GROUP BY contact_id
+        ORDER BY contact_id
+    ''', params)
+    return np.fromiter(cursor, dtype=ARCHIVE_DTYPE, count=count)
+
+
+# Function to compute every contact's stats from event columns in vectorised passes
+def compute_contact_stats(events, contacts, archive=None):
+    """Return a dict of per-contact arrays for the contacts that have events, live or archived.
+
+    events must be grouped by contact_id with each contact's events newest first, as
+    load_event_columns returns them; archive is what load_archive_columns returns.
+    """
+    live_ids, starts, counts = np.unique(events['contact_id'], return_index=True, return_counts=True)
+    groups = len(live_ids)
+    group = np.repeat(np.arange(groups), counts)
+    days = events['event_day'].astype(np.float64)
+    live_last_day = days[starts]
+
+    # Rating sums and least-squares slope over time, over the live events
+    rated = events['rating'] > 0
+    rated_group = group[rated]
+    x = days[rated] - live_last_day[rated_group]  # Relative days keep the sums small
+    y = events['rating'][rated].astype(np.float64)
+    n = np.bincount(rated_group, minlength=groups).astype(np.float64)
+    sum_x = np.bincount(rated_group, weights=x, minlength=groups)
+    sum_y = np.bincount(rated_group, weights=y, minlength=groups)
+    sum_xy = np.bincount(rated_group, weights=x * y, minlength=groups)
+    sum_xx = np.bincount(rated_group, weights=x * x, minlength=groups)
+    denominator = n * sum_xx - sum_x * sum_x
+    live_trend = np.divide(n * sum_xy - sum_x * sum_y, denominator, out=np.full(groups, np.nan),
+                           where=denominator > 0) * RATING_TREND_DAYS
+
+    # Combine with the archived totals; contacts may have live events, archived ones or both
+    if archive is None:
+        archive = np.zeros(0, dtype=ARCHIVE_DTYPE)
+    contact_ids = np.union1d(live_ids, archive['contact_id']).astype(np.int32)
+    live = np.searchsorted(contact_ids, live_ids)
+    archived = np.searchsorted(contact_ids, archive['contact_id'])
+    total = len(contact_ids)
+
+    event_count = np.zeros(total, dtype=np.int64)
+    event_count[live] += counts
+    event_count[archived] += archive['event_count']
+    last_event_day = np.full(total, np.nan)
+    last_event_day[archived] = archive['last_event_day']
+    last_event_day[live] = live_last_day  # Live events are always the newer
+    first_event_day = np.full(total, np.nan)
+    first_event_day[live] = days[starts + counts - 1]
+    first_event_day[archived] = archive['first_event_day']  # Archived events are always the older
+
+    # The mean of the gaps between consecutive events is the whole span over the number of gaps
+    mean_interval = np.divide(last_event_day - first_event_day, event_count - 1, out=np.full(total, np.nan),
+                              where=event_count > 1)
+
+    rating_count = np.zeros(total)
+    rating_count[live] += n
+    rating_count[archived] += archive['rating_count']
+    rating_sum = np.zeros(total)
+    rating_sum[live] += sum_y
+    rating_sum[archived] += archive['rating_sum']
+    mean_rating = np.divide(rating_sum, rating_count, out=np.full(total, np.nan), where=rating_count > 0)
+    rating_trend = np.full(total, np.nan)
+    rating_trend[live] = live_trend
+
+    # Drift: how much longer (positive) or shorter than the target frequency the real gaps are
+    position = np.searchsorted(contacts['id'], contact_ids)
+    position = np.minimum(position, max(len(contacts) - 1, 0))
+    if len(contacts):
+        known = contacts['id'][position] == contact_ids
+        frequency = np.where(known, contacts['frequency'][position], np.nan)
+    else:
+        frequency = np.full(total, np.nan)
+    interval_drift = mean_interval - frequency
+
+    return {
+        'contact_id': contact_ids,
+        'event_count': event_count,
+        'last_event_day': last_event_day,
+        'mean_interval': mean_interval,
+        'mean_rating': mean_rating,
+        'rating_trend': rating_trend,
+        'interval_drift': interval_drift,
+    }
+
+
+# Function to write computed stats into contact_stats
+def store_contact_stats(cursor, stats):
+    """Replace the contact_stats rows for the contacts in `stats` (NaN is stored as NULL)."""
+    columns = ['contact_id', 'event_count', 'last_event_day', 'mean_interval',
+               'mean_rating', 'rating_trend', 'interval_drift']
+    rows = zip(*[[None if value != value else value for value in stats[name].tolist()] for name in columns])
+    cursor.executemany(f'''
+        INSERT OR REPLACE INTO contact_stats ({', '.join(columns)})
+        VALUES ({', '.join('?' for _ in columns)})
+    ''', rows)
+
+
+# Function to bring contact_stats up to date, recomputing only contacts whose history changed
+def refresh_contact_stats(db_file=DB_FILE, full=False):
+    """Recompute everyone on the first run or when full=True, otherwise just the dirty contacts.
+
+    Returns the number of contacts recomputed.
+    """
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT count(*) FROM contact_stats")
+    if cursor.fetchone()[0] == 0:
+        full = True
+
+    if full:
+        contact_ids = None
+    else:
+        cursor.execute("SELECT contact_id FROM contact_stats_dirty")
+        contact_ids = [row[0] for row in cursor.fetchall()]
+        if not contact_ids:
+            conn.close()
+            return 0
+
+    events = load_event_columns(cursor, contact_ids)
+    contacts = load_contact_columns(cursor, contact_ids)
+    stats = compute_contact_stats(events, contacts, load_archive_columns(cursor, contact_ids))
+
+    # One transaction: drop the stale rows (including contacts with no events left) and write the new ones
+    if full:
+        cursor.execute("DELETE FROM contact_stats")
+    else:
+        cursor.executemany("DELETE FROM contact_stats WHERE contact_id = ?", [(contact_id,) for contact_id in contact_ids])
+    store_contact_stats(cursor, stats)
+    if full:
+        cursor.execute("DELETE FROM contact_stats_dirty")
+    else:
+        # Only the ids read above: a contact dirtied since then stays listed for the next refresh
+        cursor.execute("DELETE FROM contact_stats_dirty WHERE contact_id IN (SELECT value FROM json_each(?))",
+                       (json.dumps(contact_ids),))
+
+    conn.commit()
+    conn.close()
+    return len(stats['contact_id']) if full else len(contact_ids)
+
+
+# Function to read the cached stats, with today's neglect score, for selection and display code
+def get_contact_stats(db_file=DB_FILE):
+    """Return a dict of per-contact arrays (sorted by contact_id), refreshed if the database changed.
+
+    neglect_score is how many target intervals a contact is overdue by, weighted by how well
+    their events have gone: an overdue contact with good ratings scores higher than one with
+    poor ratings. Contacts not yet due score 0.
+    """
+    global stats_cache
+    day = today_day()
+    source = database_signature(db_file)
+    if stats_cache is not None and stats_cache['source'] == source and stats_cache['day'] == day:
+        return stats_cache['stats']
+
+    refresh_contact_stats(db_file)
+
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+    # Every contact gets a row: those with no events yet can be the most neglected of all
+    cursor.execute("SELECT count(*) FROM contacts")
+    count = cursor.fetchone()[0]
+    cursor.execute('''
+        SELECT c.id, coalesce(s.event_count, 0), s.last_event_day, s.mean_interval, s.mean_rating,
+               s.rating_trend, s.interval_drift, c.frequency, c.last_contact_day
+        FROM contacts c
+        LEFT JOIN contact_stats s ON s.contact_id = c.id
+        ORDER BY c.id
+    ''')
+    dtype = np.dtype([('contact_id', np.int32), ('event_count', np.int32)] +
+                     [(name, np.float64) for name in ('last_event_day', 'mean_interval', 'mean_rating',
+                                                      'rating_trend', 'interval_drift', 'frequency',
+                                                      'last_contact_day')])
+    table = np.fromiter(cursor, dtype=dtype, count=count)
+    conn.close()
+
+    overdue = (day - table['last_contact_day'] - table['frequency']) / table['frequency']
+    rating_weight = np.where(np.isnan(table['mean_rating']), DEFAULT_RATING, table['mean_rating']) / DEFAULT_RATING
+    neglect_score = np.nan_to_num(np.clip(overdue, 0, None) * rating_weight, nan=0.0)
+
+    stats = {name: table[name] for name in dtype.names}
+    stats['neglect_score'] = neglect_score
+    stats_cache = {'source': database_signature(db_file), 'day': day, 'stats': stats}
+    return stats
+
+
+# Function to list the most neglected relationships
+def most_neglected_contacts(limit=10, db_file=DB_FILE):
+    """Return up to `limit` (contact_id, neglect_score) pairs, most neglected first."""
+    stats = get_contact_stats(db_file)
+    scores = stats['neglect_score']
+    limit = min(limit, int(np.count_nonzero(scores > 0)))
+    if limit == 0:
+        return []
+    top = np.argpartition(-scores, limit - 1)[:limit]
+    top = top[np.argsort(-scores[top])]
+    return list(zip(stats['contact_id'][top].tolist(), scores[top].tolist()))
+
+
+# Function to pick today's contacts, favouring the most neglected relationships
+def pick_neglected_contacts(eligible_contacts, count=3, db_file=DB_FILE):
+    """Return `count` of eligible_contacts (rows starting with the contact id), or all of them if there are fewer.
+
+    Contacts are drawn at random without replacement, each weighted by 1 + neglect_score, so
+    everyone eligible can come up but long-overdue, well-rated contacts come up more often.
+    """
+    if len(eligible_contacts) <= count:
+        return list(eligible_contacts)
+    stats = get_contact_stats(db_file)
+    ids = np.array([contact[0] for contact in eligible_contacts])
+    position = np.minimum(np.searchsorted(stats['contact_id'], ids), max(len(stats['contact_id']) - 1, 0))
+    known = stats['contact_id'][position] == ids if len(stats['contact_id']) else np.zeros(len(ids), dtype=bool)
+    weights = 1 + np.where(known, stats['neglect_score'][position], 0)
+
+    # Efraimidis-Spirakis: the largest u ** (1 / weight) keys are a weighted sample without replacement
+    keys = np.array([random.random() for _ in ids]) ** (1 / weights)
+    chosen = np.argpartition(-keys, count - 1)[:count]
+    return [eligible_contacts[index] for index in chosen.tolist()]
+
+
+# Function to compute one contact's stats straight from their events, for the contact card
+def get_stats_for_contact(contact_id, db_file=DB_FILE):
+    """Return a dict of event_count, mean_interval, mean_rating and rating_trend (NaN is None), or None if they have no events."""
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+    # Just this contact's primary-key range, so it is cheap enough to run when a card opens
+    stats = compute_contact_stats(load_event_columns(cursor, [contact_id]), load_contact_columns(cursor, [contact_id]),
+                                  load_archive_columns(cursor, [contact_id]))
+    conn.close()
+    if not len(stats['contact_id']):
+        return None
+    return {name: None if value != value else value
+            for name, value in ((name, stats[name][0].item())
+                                for name in ('event_count', 'mean_interval', 'mean_rating', 'rating_trend'))}
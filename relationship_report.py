@@ -0,0 +1,234 @@
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import os
+import sqlite3
+import statistics
+import sys
+import time
+from itertools import groupby
+from urllib.request import pathname2url
+
+from contacts_db import DB_FILE, day_to_text, today_day
+
+# An offline report of every relationship, for reading on a computer rather than the device.
+# The contact id space is split into ranges that a pool of worker processes work through, one
+# range at a time, each worker with its own read-only connection. Nothing is written to the
+# database and the workers run at low priority, so the UI carries on as normal meanwhile.
+# Each worker formats its own rows, and the reports are merged back in id order into a CSV or
+# JSONL file.
+#
+# Per contact: cadence (the gaps between events), rating history, and overdue streaks (runs
+# of consecutive gaps longer than the contact's frequency). Events rolled up by
+# event_archive.py count towards event_count, first_event_date, mean_interval, rated_count and
+# mean_rating, as they do in relationship_analytics; archived_event_count says how many there
+# were. The figures that need every individual gap or rating (median, shortest and longest
+# interval, recent ratings, overdue streaks) cover the live events only.
+
+REPORT_FILE = 'relationship_report.csv'
+RANGES_PER_WORKER = 8  # More, smaller ranges keep workers evenly loaded when ids are uneven
+RATING_HISTORY = 10  # Most recent ratings listed per contact
+RECENT_RATINGS = 5  # Ratings averaged for recent_rating
+WORKER_NICENESS = 10  # Added to the workers' nice value so the UI always comes first
+
+REPORT_FIELDS = ('contact_id', 'name', 'frequency', 'event_count', 'archived_event_count',
+                 'first_event_date', 'last_event_date',
+                 'mean_interval', 'median_interval', 'shortest_interval', 'longest_interval',
+                 'rated_count', 'mean_rating', 'recent_rating', 'rating_history',
+                 'overdue_intervals', 'longest_overdue_streak', 'most_days_overdue', 'days_overdue_now')
+
+
+# Function to open a read-only connection, which can never take the write lock
+def connect_read_only(db_file=DB_FILE):
+    return sqlite3.connect(f"file:{pathname2url(os.path.abspath(db_file))}?mode=ro", uri=True)
+
+
+# Function to split the contact id space into ranges for the pool
+def contact_id_ranges(db_file=DB_FILE, count=1):
+    """Return up to count (first_id, last_id) ranges that together cover every contact."""
+    conn = connect_read_only(db_file)
+    first_id, last_id = conn.execute("SELECT min(id), max(id) FROM contacts").fetchone()
+    conn.close()
+    if first_id is None:
+        return []
+    size = max(1, -(-(last_id - first_id + 1) // count))  # Ceiling division
+    return [(start, min(start + size - 1, last_id)) for start in range(first_id, last_id + 1, size)]
+
+
+# Function to build one contact's report from their events, newest first
+def contact_report(contact, events, today, archived=None):
+    """contact is (id, name, frequency, due_day); events are (event_day, rating) rows.
+
+    archived is the contact's event_archive totals (event_count, rating_count, rating_sum,
+    first_event_day, last_event_day), if they have any.
+    """
+    contact_id, name, frequency, due_day = contact
+    days = [event_day for event_day, _ in events]
+    gaps = [newer - older for newer, older in zip(days, days[1:])]  # Newest gap first
+    ratings = [rating for _, rating in events if rating is not None]
+    archived_count, archived_rating_count, archived_rating_sum, archived_first_day, archived_last_day = \
+        archived or (0, 0, 0, None, None)
+
+    # Archived events are all older than the live ones
+    event_count = len(events) + archived_count
+    first_day = archived_first_day if archived_count else (days[-1] if days else None)
+    last_day = days[0] if days else archived_last_day
+    rated_count = len(ratings) + archived_rating_count
+
+    # Overdue streaks, oldest gap first so a streak reads in the order it happened
+    overdue_intervals = longest_streak = streak = 0
+    most_days_overdue = 0
+    for gap in reversed(gaps):
+        if frequency and gap > frequency:
+            overdue_intervals += 1
+            streak += 1
+            longest_streak = max(longest_streak, streak)
+            most_days_overdue = max(most_days_overdue, gap - frequency)
+        else:
+            streak = 0
+
+    return {
+        'contact_id': contact_id,
+        'name': name,
+        'frequency': frequency,
+        'event_count': event_count,
+        'archived_event_count': archived_count,
+        'first_event_date': day_to_text(first_day),
+        'last_event_date': day_to_text(last_day),
+        # The mean of the gaps between consecutive events is the whole span over the number of gaps
+        'mean_interval': round((last_day - first_day) / (event_count - 1), 1) if event_count > 1 else None,
+        'median_interval': statistics.median(gaps) if gaps else None,
+        'shortest_interval': min(gaps) if gaps else None,
+        'longest_interval': max(gaps) if gaps else None,
+        'rated_count': rated_count,
+        'mean_rating': round((sum(ratings) + archived_rating_sum) / rated_count, 2) if rated_count else None,
+        'recent_rating': round(statistics.fmean(ratings[:RECENT_RATINGS]), 2) if ratings else None,
+        'rating_history': ratings[:RATING_HISTORY],  # Newest first
+        'overdue_intervals': overdue_intervals,
+        'longest_overdue_streak': longest_streak,
+        'most_days_overdue': most_days_overdue,
+        'days_overdue_now': max(0, today - due_day) if due_day is not None else None,
+    }
+
+
+# Function to report on every contact in one id range
+def report_range(db_file, first_id, last_id, today):
+    """Return the reports for contacts first_id..last_id, in id order."""
+    conn = connect_read_only(db_file)
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        SELECT id, name, frequency, due_day
+        FROM contacts
+        WHERE id BETWEEN ? AND ?
+        ORDER BY id
+    ''', (first_id, last_id))
+    contacts = cursor.fetchall()
+
+    # Primary-key order: each contact's events arrive together, newest first, with no sort
+    cursor.execute('''
+        SELECT contact_id, event_day, rating
+        FROM events
+        WHERE contact_id BETWEEN ? AND ?
+        ORDER BY contact_id, event_day DESC, seq DESC
+    ''', (first_id, last_id))
+    events_by_contact = {contact_id: [(event_day, rating) for _, event_day, rating in rows]
+                         for contact_id, rows in groupby(cursor, key=lambda row: row[0])}
+
+    # Rows archived before first_event_day was kept fall back to the first of their month
+    cursor.execute('''
+        SELECT contact_id, sum(event_count), sum(rating_count), sum(rating_sum),
+               min(coalesce(first_event_day, month_day)), max(last_event_day)
+        FROM event_archive
+        WHERE contact_id BETWEEN ? AND ?
+        GROUP BY contact_id
+    ''', (first_id, last_id))
+    archived_by_contact = {row[0]: row[1:] for row in cursor.fetchall()}
+    conn.close()
+
+    return [contact_report(contact, events_by_contact.get(contact[0], []), today, archived_by_contact.get(contact[0]))
+            for contact in contacts]
+
+
+# Function run by a pool worker: report on one id range, formatted ready to write
+def format_range(args):
+    """Return (number of contacts, text) for one range's rows, without the CSV header."""
+    db_file, first_id, last_id, today, file_format = args
+    reports = report_range(db_file, first_id, last_id, today)
+    stream = io.StringIO()
+    write_reports(stream, reports, file_format, header=False)
+    return len(reports), stream.getvalue()
+
+
+# Function to lower a pool worker's priority below the UI's
+def lower_priority():
+    try:
+        os.nice(WORKER_NICENESS)
+    except (AttributeError, OSError):
+        pass  # Not available on this platform; run at normal priority
+
+
+# Function to write reports to a CSV or JSONL stream
+def write_reports(stream, reports, file_format, header=True):
+    if file_format == 'csv':
+        writer = csv.DictWriter(stream, fieldnames=REPORT_FIELDS)
+        if header:
+            writer.writeheader()
+        for report in reports:
+            writer.writerow({**report, 'rating_history': ' '.join(map(str, report['rating_history']))})
+    else:
+        for report in reports:
+            stream.write(json.dumps(report) + '\n')
+
+
+# Function to generate the full report with a pool of worker processes
+def generate_report(path=REPORT_FILE, file_format='csv', db_file=DB_FILE, workers=None):
+    """Write every contact's report to path, replacing it atomically; returns the number of contacts."""
+    workers = workers or os.cpu_count() or 1
+    today = today_day()
+    ranges = contact_id_ranges(db_file, workers * RANGES_PER_WORKER)
+    jobs = [(db_file, first_id, last_id, today, file_format) for first_id, last_id in ranges]
+
+    temp_path = path + '.tmp'
+    pool = multiprocessing.Pool(workers, initializer=lower_priority) if workers > 1 else None
+    try:
+        # imap hands back the ranges in order, so the file comes out sorted by id
+        batches = pool.imap(format_range, jobs) if pool else map(format_range, jobs)
+        count = 0
+        with open(temp_path, 'w', encoding='utf-8', newline='') as stream:
+            write_reports(stream, [], file_format)  # Just the CSV header, if any
+            for batch_count, text in batches:
+                stream.write(text)
+                count += batch_count
+        os.replace(temp_path, path)
+    except BaseException:
+        # A worker failed (or we were interrupted): stop the jobs imap has already queued rather
+        # than wait for them, and leave any previous report, not a partial one
+        if pool:
+            pool.terminate()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a relationship report for every contact.")
+    parser.add_argument("--output", default=REPORT_FILE, help="report file (CSV, or JSONL if it ends in .jsonl)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="default: from the output file's extension")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        sys.exit(f"No such database: {args.db}")
+    file_format = args.format or ('jsonl' if args.output.lower().endswith('.jsonl') else 'csv')
+    start = time.monotonic()
+    count = generate_report(args.output, file_format, args.db, args.workers)
+    print(f"Reported on {count} contacts in {time.monotonic() - start:.1f}s: {args.output}")
@@ -0,0 +1,148 @@
+import http.client
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+import api_server
+from api_server import ApiServer
+from contacts_db import day_to_text, today_day
+from db_worker import DatabaseWorker
+from generate_dataset import generate_database
+
+# Starts the API on a free localhost port against a small generated database, and talks to it
+# over real HTTP. Run with `python -m unittest test_api_server` (or pytest).
+
+CONTACTS = 50
+EVENTS = 400
+
+
+class ApiServerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp()
+        cls.db_file = os.path.join(cls.temp_dir, 'contacts_events.db')
+        generate_database(cls.db_file, CONTACTS, EVENTS, seed=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.temp_dir)
+
+    def setUp(self):
+        self.worker = DatabaseWorker(self.db_file)
+        self.logged = []
+        self.server = ApiServer(self.worker, lambda: [(1, 'Somebody', None)], self.logged.extend)
+        self.port = self.server.start(host='127.0.0.1', port=0)
+
+    def tearDown(self):
+        self.server.stop()
+        self.worker.close()
+
+    def request(self, method, path, body=None):
+        """Return (status, parsed JSON body)."""
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=10)
+        try:
+            conn.request(method, path, body=None if body is None else json.dumps(body))
+            response = conn.getresponse()
+            return response.status, json.loads(response.read())
+        finally:
+            conn.close()
+
+    def query(self, sql, params=()):
+        conn = sqlite3.connect(self.db_file)
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def test_get_contacts_streams_every_contact(self):
+        status, contacts = self.request('GET', '/contacts')
+        self.assertEqual(status, 200)
+        self.assertEqual([contact['id'] for contact in contacts],
+                         [row[0] for row in self.query("SELECT id FROM contacts ORDER BY id")])
+
+    def test_get_today(self):
+        self.assertEqual(self.request('GET', '/today'),
+                         (200, [{"id": 1, "name": "Somebody", "last_contact_date": None}]))
+
+    def test_contact_events_pages_through_history(self):
+        contact_id, count = self.query('''
+            SELECT contact_id, count(*) FROM events GROUP BY contact_id ORDER BY count(*) DESC LIMIT 1
+        ''')[0]
+        seen = []
+        path = f'/contacts/{contact_id}/events?limit=2'
+        while True:
+            status, page = self.request('GET', path)
+            self.assertEqual(status, 200)
+            self.assertLessEqual(len(page['events']), 2)
+            seen += page['events']
+            if page['next'] is None:
+                break
+            path = (f"/contacts/{contact_id}/events?limit=2"
+                    f"&before_day={page['next']['before_day']}&before_seq={page['next']['before_seq']}")
+        self.assertEqual(len(seen), count)
+        self.assertEqual(seen, sorted(seen, key=lambda event: (event['date'], event['seq']), reverse=True))
+
+    def test_contact_events_rejects_a_limit_below_one(self):
+        for limit in (0, -1):
+            status, body = self.request('GET', f'/contacts/1/events?limit={limit}')
+            self.assertEqual(status, 400)
+            self.assertIn('limit', body['error'])
+
+    def test_unknown_contact_is_404(self):
+        self.assertEqual(self.request('GET', '/contacts/999999/events')[0], 404)
+
+    def test_post_events_logs_them(self):
+        before = self.query("SELECT count(*) FROM events WHERE contact_id = 2")[0][0]
+        status, body = self.request('POST', '/events', [
+            {"contact_id": 2, "event_type": "Email", "rating": 4},
+            {"contact_id": 2, "event_type": "phone call", "date": day_to_text(today_day() - 1)},
+        ])
+        self.assertEqual((status, body), (200, {"logged": 2}))
+        self.assertEqual(self.query("SELECT count(*) FROM events WHERE contact_id = 2")[0][0], before + 2)
+        self.assertEqual([event[0] for event in self.logged], [2, 2])
+
+        status, page = self.request('GET', '/contacts/2/events?limit=1')
+        self.assertEqual(page['events'][0]['date'], day_to_text(today_day()))
+
+    def test_post_with_an_unknown_contact_logs_nothing(self):
+        before = self.query("SELECT count(*) FROM events")[0][0]
+        status, body = self.request('POST', '/events', [
+            {"contact_id": 3, "event_type": "Email"},
+            {"contact_id": 999999, "event_type": "Email"},
+        ])
+        self.assertEqual(status, 400)
+        self.assertIn('999999', body['error'])
+        self.assertEqual(self.query("SELECT count(*) FROM events")[0][0], before)
+        self.assertEqual(self.logged, [])
+
+    def test_post_with_an_invalid_event_logs_nothing(self):
+        status, body = self.request('POST', '/events', [{"contact_id": 3, "event_type": "Carrier pigeon"}])
+        self.assertEqual(status, 400)
+        self.assertEqual(body['events'][0]['index'], 0)
+
+    def test_error_mid_stream_aborts_the_connection(self):
+        def failing_page_job(cursor, after, since_day, limit):
+            if after[0] >= 0:
+                raise sqlite3.OperationalError("disk I/O error")
+            return api_server.events_page_job(cursor, after, since_day, limit)
+
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=10)
+        try:
+            with mock.patch.object(api_server, 'events_page_job', failing_page_job), \
+                    self.assertLogs('api_server', 'ERROR'):
+                conn.request('GET', '/events')
+                response = conn.getresponse()
+                self.assertEqual(response.status, 200)
+                # The body stops short instead of ending in a second response
+                with self.assertRaises(http.client.IncompleteRead):
+                    response.read()
+        finally:
+            conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
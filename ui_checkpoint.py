@@ -0,0 +1,70 @@
+import json
+import os
+import threading
+
+# Lets the UI come back where it was after a restart. The screen stack (which screen, its
+# cursor, and anything picked so far, e.g. the contact and event type in the Log Event flow)
+# is saved along with the frame that was on the display. Saves are cheap for the caller: it
+# only swaps in the latest state and wakes a writer thread, which waits CHECKPOINT_DELAY so a
+# burst of cursor moves becomes one write. The file is replaced atomically, so a power cut
+# leaves either the old checkpoint or the new one.
+#
+# File layout: one line of JSON (the screen stack), a newline, then the raw frame buffer.
+
+CHECKPOINT_FILE = 'ui_checkpoint.bin'
+CHECKPOINT_DELAY = 0.5  # Seconds changes are gathered before one write
+
+
+class Checkpointer:
+    def __init__(self, path=CHECKPOINT_FILE, delay=CHECKPOINT_DELAY):
+        self.path = path
+        self.delay = delay
+        self.pending = None  # (screen stack, frame) waiting to be written
+        self.lock = threading.Lock()
+        self.changed = threading.Event()
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def save(self, screens, frame):
+        """Record the latest screen stack (a list of dicts) and frame bytes; written shortly after."""
+        with self.lock:
+            self.pending = ([dict(screen) for screen in screens], bytes(frame))
+        self.changed.set()
+
+    def run(self):
+        while True:
+            self.changed.wait()
+            self.changed.clear()
+            self.changed.wait(self.delay)  # Let further changes land in this write
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, None
+        if pending is not None:
+            write_checkpoint(*pending, path=self.path)
+
+
+# Function to write a checkpoint file atomically
+def write_checkpoint(screens, frame, path=CHECKPOINT_FILE):
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(json.dumps(screens, separators=(',', ':')).encode() + b'\n' + frame)
+        f.flush()
+        os.fsync(f.fileno())  # The data must be on disk before the rename is
+    os.replace(temp_path, path)
+
+
+# Function to read the last checkpoint
+def load_checkpoint(path=CHECKPOINT_FILE, frame_size=None):
+    """Return (screen stack, frame bytes), or ([], None) if there is no usable checkpoint."""
+    try:
+        with open(path, 'rb') as f:
+            header, _, frame = f.read().partition(b'\n')
+        screens = json.loads(header)
+    except (OSError, ValueError):
+        return [], None
+    if not isinstance(screens, list) or not all(isinstance(screen, dict) for screen in screens):
+        return [], None
+    if not frame or (frame_size is not None and len(frame) != frame_size):
+        frame = None
+    return screens, frame
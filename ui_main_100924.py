@@ -3,148 +3,218 @@ import board
 import busio
 import adafruit_ssd1306
 from PIL import Image, ImageDraw, ImageFont
-from datetime import datetime
+from datetime import date, datetime, timedelta
 import time
 import sqlite3
 import random
 import os
 import pickle
+import collections
+import threading
+import _thread
+import argparse
+import atexit
+import logging
+import shutil
+import tempfile
+from contacts_db import (
+    setup_database, search_contacts, get_contact_details, get_event_page,
+    record_snooze, select_replacement_contact, record_contact_frequency, record_bulk_frequency,
+    select_contacts_by_ids, get_due_forecast, today_day, day_to_text, EVENT_TYPES,
+    record_event,
+)
+import contacts_db
+from contact_store import get_contact_store
+from adaptive_frequency import update_frequencies
+from relationship_analytics import get_stats_for_contact, pick_neglected_contacts
+from backup import start_backup_thread
+from event_archive import archive_old_events
+from db_worker import DatabaseWorker
+from api_server import ApiServer
+from app_log import setup_logging
+from ui_checkpoint import Checkpointer, load_checkpoint
+from button_trace import FrameCapture, read_trace, replay_edges, start_trace_recorder
+
+log = logging.getLogger('ui')
+
+# Set NETWORKING_BOT_DEBUG=1 to log every button press and screen change, not just INFO and above
+DEBUG_LOGGING = os.environ.get('NETWORKING_BOT_DEBUG') == '1'
 
 TODAY_CONTACTS_FILE = 'today_contacts.pkl'
 
-# Function to save today's contacts to a file so they persist
-def save_today_contacts(contacts):
+# Today's plan, kept in memory: {"day": epoch day, "contacts": [(id, name, last_contact_day), ...]}
+today_plan = None
+# The rollover thread, the UI and the API callback all replace the plan; they take this lock
+# for the whole read-modify-write, and the plan file is saved under it too
+today_plan_lock = threading.Lock()
+
+# Function to save today's plan to a file so it persists across restarts
+def save_today_contacts(plan):
     with open(TODAY_CONTACTS_FILE, 'wb') as f:
-        pickle.dump(contacts, f)
+        pickle.dump(plan, f)
 
-# Function to load today's contacts from the file, if they exist
+# Function to load the saved plan from the file, if it exists
 def load_today_contacts():
     if os.path.exists(TODAY_CONTACTS_FILE):
         with open(TODAY_CONTACTS_FILE, 'rb') as f:
             return pickle.load(f)
     return None
 
-# Function to check if the day has changed (for resetting the contacts)
-def is_new_day():
-    today_date = datetime.today().strftime('%Y-%m-%d')
-    if os.path.exists(TODAY_CONTACTS_FILE):
-        last_modified_date = datetime.fromtimestamp(os.path.getmtime(TODAY_CONTACTS_FILE)).strftime('%Y-%m-%d')
-        return today_date != last_modified_date
-    return True
-
-# Function to manage today's contacts, check if they need to be reset, and retrieve last_contact_date
+# Function to draw a fresh plan for today and publish it
+def regenerate_today_contacts():
+    """Pick today's contacts from the CONTACTABLE list, keep them in memory and save them."""
+    global today_plan
+    eligible_contacts = get_contactable_contacts()
+    today_contacts = suggest_contacts_for_today(eligible_contacts) if eligible_contacts else []
+    with today_plan_lock:
+        today_plan = {"day": today_day(), "contacts": [(contact[0], contact[1], contact[3]) for contact in today_contacts]}
+        save_today_contacts(today_plan)
+
+# Function to edit contacts and bring today's plan up to date (e.g. after a new frequency)
+def apply_contact_edit(edit=None, *args):
+    """Run edit(cursor, *args), if given, then patch the plan against the edited rows.
+
+    Both happen in one transaction on the database worker and the plan is saved before the
+    lock is released, so the database and the plan change together. Returns edit's result.
+    """
+    global today_plan
+    with today_plan_lock:
+        plan = today_plan
+
+        def job(cursor):
+            result = edit(cursor, *args) if edit else None
+            if not plan or not plan["contacts"]:
+                return result, None
+            return result, patched_plan_contacts(cursor, plan["contacts"], today_day())
+
+        result, contacts = db_worker.call(job)
+        if contacts is not None:
+            today_plan = {"day": plan["day"], "contacts": contacts}
+            save_today_contacts(today_plan)
+    return result
+
+# Function to re-check the plan against the database without editing anything
+def patch_today_contacts():
+    apply_contact_edit()
+
+# Function to refresh the plan's rows and swap out anyone who is no longer due today
+def patched_plan_contacts(cursor, today_contacts, today):
+    current = select_contacts_by_ids(cursor, [contact[0] for contact in today_contacts])
+
+    patched = []
+    for contact in today_contacts:
+        row = current.get(contact[0])
+        # Keep contacts already done today so they stay struck through on the Today screen
+        if row and (row[3] == today or (row[4] is not None and row[4] <= today)):
+            patched.append((row[0], row[1], row[3]))
+    for _ in range(len(today_contacts) - len(patched)):
+        replacement = select_replacement_contact(cursor, [contact[0] for contact in today_contacts] + [contact[0] for contact in patched], today)
+        if replacement:
+            patched.append((replacement[0], replacement[1], replacement[3]))
+    return patched
+
+# Function to strike a contact through in today's plan once an event has been logged for them
+def mark_today_contact_done(contact_id, day):
+    """Set last_contact_day on the contact's plan entry, if they are in today's plan."""
+    global today_plan
+    with today_plan_lock:
+        if not today_plan or contact_id not in [contact[0] for contact in today_plan["contacts"]]:
+            return
+        contacts = [(contact[0], contact[1], day) if contact[0] == contact_id else contact for contact in today_plan["contacts"]]
+        today_plan = {"day": today_plan["day"], "contacts": contacts}
+        save_today_contacts(today_plan)
+
+# Function to return today's contacts; the plan is kept current by the day rollover service
 def get_today_contacts():
-    if is_new_day() or not load_today_contacts():
-        eligible_contacts = get_contactable_contacts()
-        if eligible_contacts:
-            today_contacts = suggest_contacts_for_today(eligible_contacts)
-            save_today_contacts(today_contacts)
-        else:
-            today_contacts = []
-    else:
-        today_contacts = load_today_contacts()
-
-    # Fetch last_contact_date for each contact in today's list
-    if today_contacts:
-        conn = sqlite3.connect('contacts_events.db')
-        cursor = conn.cursor()
-
-        # Get the last_contact_date for the contacts in today's list
-        contact_ids = tuple([contact[0] for contact in today_contacts])  # Assuming contact[0] is contact_id
-        if len(contact_ids) == 1:
-            contact_ids = f"({contact_ids[0]})"  # SQL expects parentheses even for a single value
-        query = f'''
-        SELECT id, last_contact_date 
-        FROM contacts 
-        WHERE id IN {contact_ids}
-        '''
-        cursor.execute(query)
-        results = cursor.fetchall()
-        last_contact_dates = {row[0]: row[1] for row in results}  # Map contact_id to last_contact_date
-
-        # Add last_contact_date to each contact in today_contacts
-        today_contacts = [(contact[0], contact[1], last_contact_dates.get(contact[0])) for contact in today_contacts]
-
-        conn.close()
-
-    return today_contacts
-
-
-# Function to log a contact event
-def log_event(contact_id, event_type):
-    """Log a contact event in the contacts_events.db database."""
-    conn = sqlite3.connect('contacts_events.db')  # Using the correct database
-    cursor = conn.cursor()
-
-    today = datetime.today().strftime('%Y-%m-%d')
-
-    # Get user input for rating the interaction
-    rating = int(input("Rate the quality of the contact (1-5): "))
-
-    # Insert the event into the events table
-    cursor.execute('''
-        INSERT INTO events (contact_id, event_type, event_date, rating)
-        VALUES (?, ?, ?, ?)
-    ''', (contact_id, event_type, today, rating))
-
-    # Update the contact's last_contact_date in contacts.db
-    conn_contact = sqlite3.connect('contacts.db')  # Access the contacts database
-    cursor_contact = conn_contact.cursor()
-    cursor_contact.execute('''
-        UPDATE contacts
-        SET last_contact_date = ?
-        WHERE id = ?
-    ''', (today, contact_id))
-
-    conn_contact.commit()
-    conn_contact.close()
-
-    conn.commit()
-    conn.close()
-    print(f"Logged {event_type} for contact with ID {contact_id}, rated {rating}/5.")
-
-# Function to handle event logging after contact interaction
-def handle_contact_interaction(contact_id, contact_name):
-    """Prompt the user to log the contact event."""
-    print(f"Logging event for {contact_name}")
-    
-    # Ask what type of contact occurred
-    event_type = input("What kind of contact was this? (email, phone call, in-person): ")
+    return today_plan["contacts"] if today_plan else []
 
-    # Log the event and update the database
-    log_event(contact_id, event_type)
-    
-def get_all_contacts():
-    """Retrieve all contacts from the contacts_events.db."""
-    conn = sqlite3.connect('contacts_events.db')
-    cursor = conn.cursor()
 
-    # Fetch all contacts
-    cursor.execute("SELECT id, name FROM contacts")
-    contacts = cursor.fetchall()
+############# DAY ROLLOVER ####################
 
-    conn.close()
-    return contacts
+# A background thread sleeps on the monotonic clock until local midnight, then publishes a
+# "new day" to new_day_listeners. It wakes every CLOCK_CHECK_INTERVAL to compare the wall
+# clock with the monotonic clock, so a jump (NTP setting the time after boot, a manual
+# change) re-arms the timer instead of leaving it pointing at the wrong midnight.
+CLOCK_CHECK_INTERVAL = 60  # Seconds between wall-clock sanity checks while waiting for midnight
+CLOCK_JUMP_TOLERANCE = 5  # Seconds of disagreement between the clocks that counts as a jump
 
-# Function to retrieve contacts eligible for contacting
-def get_contactable_contacts():
-    conn = sqlite3.connect('contacts.db')
-    cursor = conn.cursor()
+# Adaptive frequencies: 'off', 'propose' (record suggestions only) or 'apply' (accept them too).
+# The batch job runs on the rollover thread before today's plan is drawn, so the new plan
+# already uses the learned frequencies and none of the work lands on the UI loop.
+ADAPTIVE_FREQUENCY_MODE = 'off'
 
-    today = datetime.today().date()
+# Function run at each new day to re-learn contact frequencies from their event history
+def learn_contact_frequencies():
+    if ADAPTIVE_FREQUENCY_MODE != 'off':
+        proposed, applied = update_frequencies(ADAPTIVE_FREQUENCY_MODE)
+        log.info("Adaptive frequency: %d proposed, %d applied", proposed, applied)
 
-    cursor.execute("""
-        SELECT id, name, frequency, last_contact_date 
-        FROM contacts
-        WHERE julianday(?) - julianday(last_contact_date) >= frequency
-    """, (today,))
-    
-    contacts = cursor.fetchall()
-    conn.close()
+BACKUP_MAX_AGE = 24 * 60 * 60  # At start-up, back up if the newest snapshot is older than this (seconds)
+
+# Each new day also archives events past the horizon and then starts a backup on its own thread
+new_day_listeners = [learn_contact_frequencies, regenerate_today_contacts, archive_old_events, start_backup_thread]
+
+# Function to work out how long it is until the next local midnight
+def seconds_until_midnight():
+    # Via timestamps, which apply the local UTC offset: a day with a DST change isn't 24 hours
+    midnight = datetime.combine(date.today() + timedelta(days=1), datetime.min.time())
+    return midnight.timestamp() - time.time()
+
+# Function run by the day rollover thread
+def day_rollover_service(current_day):
+    """Publish a new day to new_day_listeners each time the local date moves past current_day."""
+    while True:
+        deadline = time.monotonic() + seconds_until_midnight()
+        wall_start, monotonic_start = time.time(), time.monotonic()
+
+        while time.monotonic() < deadline:
+            time.sleep(max(0, min(deadline - time.monotonic(), CLOCK_CHECK_INTERVAL)))
+            drift = (time.time() - wall_start) - (time.monotonic() - monotonic_start)
+            if abs(drift) > CLOCK_JUMP_TOLERANCE:
+                break  # The wall clock jumped: recompute midnight (and check whether it has passed)
+
+        day = today_day()
+        if day != current_day:
+            current_day = day
+            for listener in new_day_listeners:
+                try:
+                    listener()
+                except Exception:
+                    # One failing job (e.g. "database is locked") must not stop the rest, or any later midnight
+                    log.exception("New day listener %s failed", listener.__name__)
+
+# Function to load or draw today's plan at start-up
+def restore_today_plan():
+    """Restore today's plan from TODAY_CONTACTS_FILE if it is for today, otherwise draw a new one."""
+    global today_plan
+    saved_plan = load_today_contacts()
+    # Older versions saved a bare list with no day, which can't be trusted
+    if isinstance(saved_plan, dict) and saved_plan.get("day") == today_day():
+        with today_plan_lock:
+            today_plan = saved_plan
+        patch_today_contacts()  # The app may have stopped between a database edit and saving the plan
+    else:
+        regenerate_today_contacts()
 
-    print(f"Eligible contacts: {contacts}")  # Add this print statement
+# Function to set up today's plan and start watching for midnight
+def start_day_rollover_service():
+    restore_today_plan()
+    threading.Thread(target=day_rollover_service, args=(today_plan["day"],), daemon=True).start()
 
-    return contacts
+
+# The compact contact store behind the list screens; refreshed whenever the database changes
+contact_store = None
+
+# Function to get every contact, sorted by name, as lightweight views over the contact store
+def get_sorted_contacts():
+    """Return the contact store: indexable like a list of (id, name), without a tuple per contact."""
+    global contact_store
+    contact_store = get_contact_store(current=contact_store)
+    return contact_store
+
+def get_all_contacts():
+    """Retrieve all contacts from the contacts_events.db."""
+    return contacts_db.get_all_contacts()
 
 # Function to randomly select 3 contacts from the eligible list
 def suggest_contacts_for_today(eligible_contacts):
@@ -224,27 +294,28 @@ def display_contacts_menu(contacts, current_selection):
 # Function to navigate through the contacts
 def contacts_menu():
     """Allow the user to scroll through the list of contacts."""
-    contacts = get_all_contacts()
-    current_selection = 0
+    contacts = get_sorted_contacts()  # Already sorted by name
+    current_selection = contact_index(contacts, resume_state("contacts").get("contact_id"))
     display_contacts_menu(contacts, current_selection)
+    enter_screen("contacts", contact_id=contacts[current_selection][0] if contacts else None)
+    clear_buttons()
 
     while True:
-        if GPIO.input(UP_BUTTON_PIN) == GPIO.LOW:  # Scroll up
-            current_selection = (current_selection - 1) % len(contacts)
-            display_contacts_menu(contacts, current_selection)
-            time.sleep(0.3)  # Debounce
+        sleep_if_idle()  # Blank the display and stop polling when nobody is using it
+        marquee_tick()  # Scroll a long selected name, if there is one
 
-        if GPIO.input(DOWN_BUTTON_PIN) == GPIO.LOW:  # Scroll down
-            current_selection = (current_selection + 1) % len(contacts)
+        move, action = next_input()  # At most one redraw per frame, however fast UP/DOWN repeat
+        if move and contacts:
+            current_selection = (current_selection + move) % len(contacts)
             display_contacts_menu(contacts, current_selection)
-            time.sleep(0.3)  # Debounce
+            update_screen(contact_id=contacts[current_selection][0])
 
-        if GPIO.input(CONFIRM_BUTTON_PIN) == GPIO.LOW:  # OK button pressed
-            print(f"Selected contact: {contacts[current_selection][1]}")  # Action on contact selection
-            time.sleep(0.3)  # Debounce
+        if action == CONFIRM_BUTTON_PIN and contacts:  # OK button pressed
+            log.debug("Selected contact: %s", contacts[current_selection][1])  # Action on contact selection
 
-        if GPIO.input(BACK_BUTTON_PIN) == GPIO.LOW:  # Back button pressed
-            print("Back to main menu")
+        if action == BACK_BUTTON_PIN:  # Back button pressed
+            log.debug("Back to main menu")
+            time.sleep(0.3)  # Debounce for the polling main menu
             return  # Return to the previous screen
 # Your OLED, GPIO, and other imports here
 
@@ -254,31 +325,12 @@ def contacts_menu():
 # Function to retrieve contacts eligible for contacting based on their last contact date and frequency
 def get_contactable_contacts():
     """Retrieve contacts that are eligible for contacting based on their last contact date and frequency."""
-    conn = sqlite3.connect('contacts_events.db')
-    cursor = conn.cursor()
-
-    today = datetime.today().strftime('%Y-%m-%d')
-
-    # Query to find contacts where the difference between today and last_contact_date exceeds frequency
-    cursor.execute('''
-        SELECT id, name, frequency, last_contact_date 
-        FROM contacts
-        WHERE julianday(?) - julianday(last_contact_date) >= frequency
-    ''', (today,))
-    
-    contacts = cursor.fetchall()
-    conn.close()
-
-    return contacts
+    return contacts_db.get_contactable_contacts()
 
-# Function to randomly select 3 contacts from the eligible list
+# Function to select 3 contacts from the eligible list, favouring the most neglected
 def suggest_contacts_for_today(eligible_contacts):
-    """Select 3 random contacts from the eligible pool."""
-    if len(eligible_contacts) <= 3:
-        return eligible_contacts  # If fewer than 3 contacts are eligible, return all of them
-    else:
-        import random
-        return random.sample(eligible_contacts, 3)
+    """Select 3 contacts from the eligible pool, weighted by neglect score."""
+    return pick_neglected_contacts(eligible_contacts)
 
 # Main function to handle the "Today" suggestions
 def daily_contact_suggestions():
@@ -287,35 +339,46 @@ def daily_contact_suggestions():
     if eligible_contacts:
         suggested_contacts = suggest_contacts_for_today(eligible_contacts)
         # Display logic (as per your existing UI code) for these contacts
-        print(f"Suggested contacts for today: {suggested_contacts}")
+        log.debug("Suggested contacts for today: %s", suggested_contacts)
     else:
-        print("No contacts are eligible for today.")
+        log.debug("No contacts are eligible for today")
         
         
 
 def log_event_to_db(contact_id, event_type, rating):
-    """Log the event in the contacts_events.db database and update the contact's last_contact_date."""
-    conn = sqlite3.connect('contacts_events.db')
-    cursor = conn.cursor()
+    """Log the event in the contacts_events.db database and update the contact's last_contact_day."""
+    today = today_day()
+    db_worker.call(record_event, contact_id, event_type, rating, today)
+    mark_today_contact_done(contact_id, today)  # Strike them through without re-reading the plan
+    log.info("Logged event for contact %s", contact_id, extra={"fields": {"type": event_type, "rating": rating}})
+
+
+############# DATABASE WORKER AND API ####################
 
-    today = datetime.today().strftime('%Y-%m-%d')
+# The UI's writes (logging events, snoozes, frequency edits) go through one connection on the
+# worker thread, started in __main__, and so do the optional HTTP API's reads and writes. The
+# nightly batch jobs (adaptive frequencies, stats refresh, archiving, backups) open their own
+# connections instead: they run for longer than a UI write should wait behind, so they do their
+# reading and computing outside a transaction, keep their writes short, and rely on WAL and
+# sqlite3's default five-second busy timeout to interleave with the worker.
+API_ENABLED = False
+API_PORT = 8080
 
-    # Insert the event into the events table
-    cursor.execute('''
-        INSERT INTO events (contact_id, event_type, event_date, rating)
-        VALUES (?, ?, ?, ?)
-    ''', (contact_id, event_type, today, rating))
+db_worker = None
 
-    # Update the contact's last_contact_date in the contacts table
-    cursor.execute('''
-        UPDATE contacts
-        SET last_contact_date = ?
-        WHERE id = ?
-    ''', (today, contact_id))
+# Function to strike through today's contacts when events for them arrive over the API
+def on_api_events_logged(events):
+    for contact_id, event_day, _, _ in events:
+        if event_day == today_day():
+            mark_today_contact_done(contact_id, event_day)
 
-    conn.commit()
-    conn.close()
-    print("Event logged successfully!")
+# Function to start the database worker, and the API if it is enabled
+def start_database_worker():
+    global db_worker
+    db_worker = DatabaseWorker()
+    if API_ENABLED:
+        port = ApiServer(db_worker, get_today_contacts, on_api_events_logged).start(port=API_PORT)
+        log.info("API listening on port %d", port)
 
 
 # GPIO setup
@@ -334,19 +397,382 @@ GPIO.setup(CONFIRM_BUTTON_PIN, GPIO.IN, pull_up_down=GPIO.PUD_UP)
 i2c = busio.I2C(board.SCL, board.SDA)
 oled = adafruit_ssd1306.SSD1306_I2C(128, 64, i2c)
 
+############# RESUME ####################
+
+# Screens that support it keep screen_stack current: each pushes its state once it is drawn,
+# updates it as the cursor moves, and its caller trims the stack back once it returns. Every
+# change is checkpointed along with the frame on the display (see ui_checkpoint.py). After a
+# restart the last frame goes straight back on the display, before the database is even
+# opened, and main_menu then walks back down the stack. Screens without an entry of their own
+# (search, forecast, the contact splash) resume at the nearest screen below them that has one.
+checkpointer = None  # Started in __main__
+screen_stack = []  # [{"screen": name, ...its state}, ...], main menu first
+resume_stack = []  # The checkpointed stack still to be walked back into at start-up
+
+# Function to put the checkpointed frame back on the display and queue its screens for resuming
+def show_checkpointed_frame():
+    global resume_stack
+    resume_stack, frame = load_checkpoint(frame_size=len(oled.buffer))
+    if frame:
+        oled.buffer[:] = frame
+        oled.show()
+
+show_checkpointed_frame()
+
+# Function to return a screen's checkpointed state if start-up is resuming into it
+def resume_state(screen):
+    """Return the state saved for screen when it is next on the resume stack, else {}."""
+    if resume_stack and resume_stack[0].get("screen") == screen:
+        return resume_stack.pop(0)
+    resume_stack.clear()  # The path back has ended; open everything else fresh
+    return {}
+
+# Function to checkpoint the screen stack with the frame now on the display
+def checkpoint_screens():
+    if checkpointer:
+        checkpointer.save(screen_stack, oled.buffer)
+
+# Function to push a newly drawn screen
+def enter_screen(screen, **state):
+    screen_stack.append({"screen": screen, **state})
+    checkpoint_screens()
+
+# Function to update the state of the screen on top
+def update_screen(**state):
+    screen_stack[-1].update(state)
+    checkpoint_screens()
+
+# Function to drop the screens above depth after they return and the caller has redrawn
+def return_to_screen(depth):
+    del screen_stack[depth:]
+    checkpoint_screens()
+
+# Function to find a contact's position in a list, for resuming a cursor by contact id
+def contact_index(contacts, contact_id):
+    return next((i for i, contact in enumerate(contacts) if contact[0] == contact_id), 0)
+
+############# BUTTON INPUT ####################
+
+# Presses are captured by GPIO edge callbacks into a queue, so none are lost while a frame
+# is being pushed over I2C. Screens that scroll long lists read them through next_input(),
+# which renders at most MAX_FPS frames and folds every UP/DOWN queued in between into one move.
+MAX_FPS = 15  # Upper bound on redraws per second while scrolling
+BOUNCE_MS = 50  # Edges closer together than this on one pin are contact bounce
+REPEAT_DELAY = 0.4  # Seconds UP/DOWN must be held before it starts repeating
+REPEAT_INTERVAL = 0.05  # Seconds between repeats while UP/DOWN is held
+
+button_events = collections.deque()  # Pins pressed, oldest first; appended from the GPIO thread
+button_signal = threading.Event()  # Set whenever button_events gains a press
+held_buttons = {}  # UP/DOWN pin -> time of its last press or repeat, while it is held
+last_frame_time = 0.0
+last_activity = time.monotonic()  # Time of the most recent press, for the idle manager
+trace_recorder = None  # Started in __main__ unless a trace is being replayed
+
+# Function called by RPi.GPIO (on its own thread) for every press
+def on_button_edge(pin):
+    """Queue the press and, for UP/DOWN, start tracking it as held."""
+    global last_activity
+    if trace_recorder:
+        trace_recorder.press(pin, lambda: GPIO.input(pin) == GPIO.LOW)  # The recorder watches for the release
+    last_activity = time.monotonic()
+    if pin in (UP_BUTTON_PIN, DOWN_BUTTON_PIN):
+        held_buttons[pin] = time.monotonic() + REPEAT_DELAY - REPEAT_INTERVAL
+    button_events.append(pin)
+    button_signal.set()
+
+BUTTON_PINS = (UP_BUTTON_PIN, DOWN_BUTTON_PIN, BACK_BUTTON_PIN, CONFIRM_BUTTON_PIN)
+for pin in BUTTON_PINS:
+    GPIO.add_event_detect(pin, GPIO.FALLING, callback=on_button_edge, bouncetime=BOUNCE_MS)
+
+# Function to drop presses made on screens that still poll GPIO.input directly
+def clear_buttons():
+    """Forget queued presses so a screen starts with a clean queue."""
+    button_events.clear()
+    held_buttons.clear()
+    button_signal.clear()
+
+# Function to add auto-repeat presses for UP/DOWN buttons that are still held down
+def queue_held_repeats():
+    """Append one press per REPEAT_INTERVAL elapsed for each held UP/DOWN button."""
+    now = time.monotonic()
+    for pin, last_repeat in list(held_buttons.items()):
+        if GPIO.input(pin) != GPIO.LOW:
+            held_buttons.pop(pin, None)  # Released
+            continue
+        repeats = int((now - last_repeat) / REPEAT_INTERVAL)
+        if repeats > 0:
+            held_buttons[pin] = last_repeat + repeats * REPEAT_INTERVAL
+            button_events.extend([pin] * repeats)
+
+# Function to wait for the next frame and return what the buttons asked for since the last one
+def next_input():
+    """Return (move, action): the net cursor move from UP/DOWN, and BACK/OK pin or None.
+
+    Returns (0, None) after at most one frame interval with no presses, so callers can keep
+    animating. Presses after a BACK/OK stay queued for the next call.
+    """
+    global last_frame_time
+    frame_interval = 1 / MAX_FPS
+
+    queue_held_repeats()
+    if not button_events:
+        button_signal.wait(frame_interval)
+        button_signal.clear()
+        queue_held_repeats()
+        if not button_events:
+            return 0, None
+
+    # Hold the frame until its slot; presses arriving meanwhile are folded into it
+    delay = last_frame_time + frame_interval - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+    last_frame_time = time.monotonic()
+    queue_held_repeats()
+
+    move = 0
+    while button_events:
+        pin = button_events.popleft()
+        if pin == UP_BUTTON_PIN:
+            move -= 1
+        elif pin == DOWN_BUTTON_PIN:
+            move += 1
+        else:
+            held_buttons.clear()  # Leaving or confirming stops any scroll in progress
+            return move, pin
+    return move, None
+
+
+############# IDLE ####################
+
+# After IDLE_TIMEOUT seconds without a press the display is switched off and the loop that
+# noticed blocks on the button queue instead of polling. The SSD1306 keeps its RAM while off.
+IDLE_TIMEOUT = 120  # Seconds without a press before the display sleeps
+
+# Function to put the display to sleep and park the caller until a button is pressed
+def sleep_if_idle():
+    """Return False if there was a recent press; otherwise sleep, wake on a press, swallow it, return True."""
+    if time.monotonic() - last_activity < IDLE_TIMEOUT:
+        return False
+
+    oled.poweroff()  # SSD1306 display-off command
+
+    clear_buttons()  # Polling screens leave old presses queued; only a new one may wake the display
+    while not button_events:
+        button_signal.wait()  # No polling: the GPIO edge callback sets this
+        button_signal.clear()
+
+    # The wake press only wakes: wait for release so the screen underneath doesn't act on it
+    while any(GPIO.input(pin) == GPIO.LOW for pin in BUTTON_PINS):
+        time.sleep(0.02)
+    clear_buttons()
+
+    oled.poweron()
+    oled.show()  # The last frame is still in oled.buffer; resend it in one transfer
+    return True
+
+############# BUTTON TRACES ####################
+
+# Every press and release is recorded to a trace in traces/ (see button_trace.py). Running the UI with
+# --replay TRACE plays one back instead of reading the buttons: each press goes through
+# on_button_edge and the polling screens see the pin held down through GPIO.input, for as long
+# as it was held in the recording. Every frame sent to the display is captured, and when the
+# trace ends the press-to-frame latencies are reported and the UI exits. At speeds above 1 the
+# holds shrink too, so screens that still poll with a 0.3 s debounce can miss short presses.
+#
+# A replay logs events, snoozes and edits frequencies just as the recorded session did, so it
+# runs in a temporary directory on a snapshot of the database and today's plan, which is
+# deleted when it exits. The midnight rollover and backup threads aren't started.
+REPLAY_SETTLE = 2.0  # Seconds to keep capturing after the last edge
+
+# Function to move the app onto a throwaway copy of its data, so a replay can't change the real data
+def use_replay_copy():
+    """Snapshot the database and today's plan into a temporary directory and make it the working directory."""
+    replay_dir = tempfile.mkdtemp(prefix='networking-bot-replay-')
+    source = sqlite3.connect(contacts_db.DB_FILE)
+    copy = sqlite3.connect(os.path.join(replay_dir, os.path.basename(contacts_db.DB_FILE)))
+    source.backup(copy)  # Consistent even if the app is running and writing to it
+    copy.close()
+    source.close()
+    if os.path.exists(TODAY_CONTACTS_FILE):
+        shutil.copy(TODAY_CONTACTS_FILE, replay_dir)
+    os.chdir(replay_dir)  # Every data file the app uses is relative to the working directory
+    atexit.register(shutil.rmtree, replay_dir, ignore_errors=True)
+    return replay_dir
+
+# Function to play a trace back through the input layer, capturing every frame
+def replay_button_trace(path, speed=1.0, frames_path=None):
+    """Start the replay on its own thread; main_menu must then be run to respond to it."""
+    global resume_stack
+    info, edges = read_trace(path)
+    resume_stack = list(info.get("screens", []))  # Start on the screen the recording started on
+
+    real_input, real_show = GPIO.input, oled.show
+    replay_pressed = set()  # Pins the trace is holding down
+    capture = FrameCapture()
+
+    def replay_input(pin):
+        return GPIO.LOW if pin in replay_pressed else real_input(pin)
+
+    def capturing_show():
+        real_show()
+        capture.frame(oled.buffer)
+
+    def on_edge(pin, pressed):
+        if pressed:
+            replay_pressed.add(pin)
+            capture.press()
+            on_button_edge(pin)
+        else:
+            replay_pressed.discard(pin)
+
+    def run():
+        replay_edges(edges, on_edge, speed)
+        time.sleep(REPLAY_SETTLE)
+        log.info("Replayed %s at %gx: %s", path, speed, capture.summary())
+        if frames_path:
+            capture.write(frames_path)
+        _thread.interrupt_main()  # main_menu never returns; stop it
+
+    GPIO.input = replay_input
+    oled.show = capturing_show
+    threading.Thread(target=run, daemon=True).start()
+
+
 ####################UI SECTION##################################
 
 
 ############# MAIN MENU ####################
 
 # Menu options
-menu_options = ["Today", "Log Event", "Contacts"]
+menu_options = ["Today", "Log Event", "Contacts", "Search", "Forecast"]
 current_selection = 0
 
 # Load fonts
 font = ImageFont.load_default()
 large_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 16)  # Larger font for the selected menu item
 
+############# MARQUEE ####################
+
+# Long names scroll sideways instead of being clipped at the right edge of the display.
+# Each name is rasterised once into a strip already laid out as SSD1306 page bytes, so a
+# tick only slices that strip into the frame buffer and sends the pages it covers.
+MARQUEE_GAP = 24  # Blank pixels between the end of a name and the start of its next pass
+MARQUEE_STEP = 2  # Pixels scrolled per tick
+MARQUEE_INTERVAL = 0.05  # Seconds between ticks (20 fps)
+MARQUEE_START_DELAY = 1.0  # Seconds a long name stays still before it starts scrolling
+NAME_STRIP_CACHE_SIZE = 256  # Strips kept before the cache is emptied and starts over
+
+name_strips = {}  # (text, font path, font size, y offset, pages) -> (strip width, page byte rows)
+pending_marquee = None  # Set while a screen is being drawn, picked up by start_marquee()
+marquee = None  # The name currently scrolling, if any
+
+# Function to rasterise a name once into page-ordered bytes, doubled so any viewport is one slice
+def get_name_strip(text, text_font, y_offset, page_count):
+    """Return (strip_width, [bytearray per page]) for text drawn y_offset pixels below the first page."""
+    # Screens load their TrueType fonts on every redraw, so key on the font file and size, not the object
+    key = (text, getattr(text_font, "path", None), getattr(text_font, "size", None), y_offset, page_count)
+    if key in name_strips:
+        return name_strips[key]
+    if len(name_strips) >= NAME_STRIP_CACHE_SIZE:
+        name_strips.clear()
+
+    bbox = ImageDraw.Draw(Image.new("1", (1, 1))).textbbox((0, 0), text, font=text_font)
+    strip_width = bbox[2] + MARQUEE_GAP
+    image = Image.new("1", (strip_width, page_count * 8))
+    ImageDraw.Draw(image).text((0, y_offset), text, font=text_font, fill=255)
+    pixels = image.load()
+
+    # SSD1306 page bytes: one byte per column, bit n is the nth pixel row of the page
+    pages = []
+    for page in range(page_count):
+        row = bytearray(strip_width)
+        for x in range(strip_width):
+            byte = 0
+            for bit in range(8):
+                if pixels[x, page * 8 + bit]:
+                    byte |= 1 << bit
+            row[x] = byte
+        pages.append(row + row)
+
+    name_strips[key] = (strip_width, pages)
+    return name_strips[key]
+
+# Function to draw a name, handing it to the marquee instead if it does not fit
+def draw_name(draw, x, y, text, text_font):
+    """Draw text at (x, y); a name wider than the display is left out and scrolled by the marquee."""
+    global pending_marquee
+    bbox = draw.textbbox((0, 0), text, font=text_font)
+    if bbox[2] <= oled.width - x:
+        draw.text((x, y), text, font=text_font, fill=255)
+        return
+    pending_marquee = (text, text_font, x, y, bbox[3])
+
+# Function to start scrolling the name left out by draw_name, once the frame is in oled.buffer
+def start_marquee():
+    """Call between oled.image() and oled.show(); stops any previous marquee."""
+    global pending_marquee, marquee
+    marquee = None
+    if pending_marquee is None:
+        return
+
+    text, text_font, x, y, line_height = pending_marquee
+    pending_marquee = None
+
+    first_page = y // 8
+    last_page = min((y + line_height - 1) // 8, oled.height // 8 - 1)
+    strip_width, strip = get_name_strip(text, text_font, y - first_page * 8, last_page - first_page + 1)
+
+    # What else is drawn in those pages (neighbouring rows, strike-throughs) stays underneath
+    width = oled.width - x
+    background = []
+    for page in range(first_page, last_page + 1):
+        start = 1 + page * oled.width + x  # oled.buffer[0] is the I2C data control byte
+        background.append(bytes(oled.buffer[start:start + width]))
+
+    marquee = {
+        "strip": strip, "strip_width": strip_width, "background": background,
+        "x": x, "width": width, "first_page": first_page, "last_page": last_page,
+        "offset": 0, "next_tick": time.monotonic() + MARQUEE_START_DELAY,
+    }
+    blit_marquee()
+
+# Function to copy the visible slice of the strip into the frame buffer
+def blit_marquee():
+    """Write the strip's current viewport over the background of its pages in oled.buffer."""
+    offset, width, x = marquee["offset"], marquee["width"], marquee["x"]
+    for i, page in enumerate(range(marquee["first_page"], marquee["last_page"] + 1)):
+        start = 1 + page * oled.width + x
+        window = marquee["strip"][i][offset:offset + width]
+        oled.buffer[start:start + width] = bytes(a | b for a, b in zip(marquee["background"][i], window))
+
+# Function to send only some pages of the frame buffer to the display
+def show_pages(first_page, last_page):
+    """Like oled.show(), but transfers pages first_page..last_page instead of the whole 1 KB frame."""
+    oled.write_cmd(0x21)  # SET_COL_ADDR
+    oled.write_cmd(0)
+    oled.write_cmd(oled.width - 1)
+    oled.write_cmd(0x22)  # SET_PAGE_ADDR
+    oled.write_cmd(first_page)
+    oled.write_cmd(last_page)
+    start = 1 + first_page * oled.width
+    end = 1 + (last_page + 1) * oled.width
+    with oled.i2c_device:
+        oled.i2c_device.write(b"\x40" + bytes(oled.buffer[start:end]))
+
+# Function to advance the marquee; called on every pass of the menu polling loops
+def marquee_tick():
+    """Scroll the current long name by one step if its interval has elapsed."""
+    if marquee is None or time.monotonic() < marquee["next_tick"]:
+        return
+    marquee["offset"] = (marquee["offset"] + MARQUEE_STEP) % marquee["strip_width"]
+    marquee["next_tick"] += MARQUEE_INTERVAL
+    # Don't try to catch up on ticks missed while the loop was busy elsewhere
+    if marquee["next_tick"] < time.monotonic():
+        marquee["next_tick"] = time.monotonic() + MARQUEE_INTERVAL
+    blit_marquee()
+    show_pages(marquee["first_page"], marquee["last_page"])
+
+
 # Draw the scroll bar
 
 def draw_scroll_bar(draw, selected, total_items):
@@ -411,7 +837,7 @@ def display_menu(current_selection):
     image = Image.new("1", (oled.width, oled.height))
     draw = ImageDraw.Draw(image)
 
-    menu_options = ["Today", "Log Event", "Contacts"]
+    menu_options = ["Today", "Log Event", "Contacts", "Search", "Forecast"]
 
     # Use different font sizes for the selected and non-selected options
     small_font = ImageFont.truetype("DejaVuSans.ttf", 12)  # Small font for non-selected items
@@ -444,17 +870,24 @@ def display_menu(current_selection):
 # Main Menu function with hidden cycle behavior and larger selected text with spacing
 def main_menu():
     global current_selection
-    current_selection = 0  # Starting position
+    current_selection = resume_state("main").get("selection", 0) % len(menu_options)  # Starting position
 
     display_menu(current_selection)  # Ensure the menu is drawn when returning to it
+    screen_stack.clear()
+    enter_screen("main", selection=current_selection)
+    if resume_stack:  # Restarted inside a screen opened from here: go straight back into it
+        open_menu_option(menu_options[current_selection])
 
     while True:
+        sleep_if_idle()  # Blank the display and stop polling when nobody is using it
+
         if GPIO.input(UP_BUTTON_PIN) == GPIO.LOW:  # Move selection up
             if current_selection > 0:  # Don't visually cycle up past the first item
                 current_selection -= 1
             else:
                 current_selection = len(menu_options) - 1  # Wrap around to last option
             display_menu(current_selection)
+            update_screen(selection=current_selection)
             time.sleep(0.3)  # Debounce
 
         if GPIO.input(DOWN_BUTTON_PIN) == GPIO.LOW:  # Move selection down
@@ -463,33 +896,40 @@ def main_menu():
             else:
                 current_selection = 0  # Wrap around to the first option
             display_menu(current_selection)
+            update_screen(selection=current_selection)
             time.sleep(0.3)  # Debounce
 
         if GPIO.input(CONFIRM_BUTTON_PIN) == GPIO.LOW:  # OK button pressed
-            selected_option = menu_options[current_selection]
-            if selected_option == "Today":
-                today_menu()  # Call the Today menu
-                display_menu(current_selection)  # Redraw main menu when coming back from Today
-            elif selected_option == "Log Event":
-                log_event_menu()  # Call the Log Event menu
-                display_menu(current_selection)  # Redraw main menu when coming back from Log Event
-            elif selected_option == "Contacts":
-                contacts_menu()  # Call the Contacts menu
-                display_menu(current_selection)  # Redraw main menu when coming back from Contacts
+            open_menu_option(menu_options[current_selection])
             time.sleep(0.3)  # Debounce
 
         if GPIO.input(BACK_BUTTON_PIN) == GPIO.LOW:  # Back button pressed
-            print("Already in main menu")  # No Back needed on main menu
+            log.debug("Already in main menu")  # No Back needed on main menu
             display_menu(current_selection)  # Always redraw when Back is pressed to ensure the main menu appears
             time.sleep(0.3)  # Debounce
 
+# Function to open a main menu option, then redraw the main menu when it returns
+def open_menu_option(selected_option):
+    if selected_option == "Today":
+        today_menu()  # Call the Today menu
+    elif selected_option == "Log Event":
+        log_event_menu()  # Call the Log Event menu
+    elif selected_option == "Contacts":
+        contacts_menu()  # Call the Contacts menu
+    elif selected_option == "Search":
+        search_menu()  # Call the Search screen
+    elif selected_option == "Forecast":
+        forecast_menu()  # Call the Forecast screen
+    display_menu(current_selection)  # Redraw main menu when coming back
+    return_to_screen(1)
+
 
 ############################# TODAY MENU #############################
 
 
-# Function to display the Today menu with strike-through for contacts with today's last_contact_date
+# Function to display the Today menu with strike-through for contacts with today's last_contact_day
 def display_today_menu(contacts, current_selection):
-    """Display the list of contacts for today, with strike-through for names whose last_contact_date is today."""
+    """Display the list of contacts for today, with strike-through for names whose last_contact_day is today."""
     oled.fill(0)
     image = Image.new("1", (oled.width, oled.height))
     draw = ImageDraw.Draw(image)
@@ -499,21 +939,23 @@ def display_today_menu(contacts, current_selection):
     if len(contacts) == 0:
         draw.text((0, 20), "No contacts today!", font=small_font, fill=255)
     else:
-        # Display the contact names and apply strike-through if last_contact_date is today
+        # Display the contact names and apply strike-through if last_contact_day is today
+        today = today_day()
         for i, contact in enumerate(contacts):
             contact_name = contact[1]
-            last_contact_date = contact[2]
+            last_contact_day = contact[2]
             y_position = 10 + i * 16
 
             # Check if the contact's last contact date is today
-            if last_contact_date == datetime.today().strftime('%Y-%m-%d'):
+            if last_contact_day == today:
                 # Draw a strike-through just over the contact's name
                 name_width, _ = draw.textsize(contact_name, font=small_font)
                 draw.line((0, y_position + 8, name_width, y_position + 8), fill=255)
 
             # Display the contact's name
             if i == current_selection:
-                draw.text((0, y_position), "> " + contact_name, font=small_font, fill=255)  # Selected contact
+                draw.text((0, y_position), "> ", font=small_font, fill=255)  # Selected contact
+                draw_name(draw, draw.textbbox((0, 0), "> ", font=small_font)[2], y_position, contact_name, small_font)
             else:
                 draw.text((0, y_position), contact_name, font=small_font, fill=255)  # Non-selected contact
 
@@ -521,6 +963,7 @@ def display_today_menu(contacts, current_selection):
     draw.text((oled.width - 25, oled.height - 12), "OK", font=small_font, fill=255)
 
     oled.image(image)
+    start_marquee()
     oled.show()
 
 
@@ -528,62 +971,40 @@ def display_today_menu(contacts, current_selection):
 def today_menu():
     """Navigate the Today menu."""
     contacts = get_today_contacts()  # Get today's contacts from the database
-    current_selection = 0
+    current_selection = contact_index(contacts, resume_state("today").get("contact_id"))
 
     display_today_menu(contacts, current_selection)
+    enter_screen("today", contact_id=contacts[current_selection][0] if contacts else None)
 
     while True:
+        sleep_if_idle()  # Blank the display and stop polling when nobody is using it
+        marquee_tick()  # Scroll a long selected name, if there is one
+
         if GPIO.input(UP_BUTTON_PIN) == GPIO.LOW:  # Scroll up
             current_selection = (current_selection - 1) % len(contacts)
             display_today_menu(contacts, current_selection)
+            update_screen(contact_id=contacts[current_selection][0])
             time.sleep(0.3)  # Debounce
 
         if GPIO.input(DOWN_BUTTON_PIN) == GPIO.LOW:  # Scroll down
             current_selection = (current_selection + 1) % len(contacts)
             display_today_menu(contacts, current_selection)
+            update_screen(contact_id=contacts[current_selection][0])
             time.sleep(0.3)  # Debounce
 
         if GPIO.input(CONFIRM_BUTTON_PIN) == GPIO.LOW:  # OK button pressed
             selected_contact = contacts[current_selection]
-            today_contact_selected(selected_contact[1])  # Pass contact's name to the splash screen
+            depth = len(screen_stack)
+            today_contact_selected(selected_contact[0], selected_contact[1])  # Pass contact's id and name to the splash screen
+            display_today_menu(contacts, current_selection)  # Redraw the list when coming back from the contact
+            return_to_screen(depth)
             time.sleep(0.3)  # Debounce
 
         if GPIO.input(BACK_BUTTON_PIN) == GPIO.LOW:  # Back button pressed
-            print("Back to main menu")
+            log.debug("Back to main menu")
             return  # Go back to the main menu
             time.sleep(0.3)  # Debounce
-    
-"""Function to handle the "Today" menu navigation
-def today_menu(contacts):
-    # Allow the user to navigate through the 'Today' contacts or see the 'No contacts' message.
-    current_selection = 0
-    display_today_menu(contacts, current_selection)#
-
-    while True:
-        if GPIO.input(UP_BUTTON_PIN) == GPIO.LOW:  # Scroll up
-            if contacts:
-                current_selection = (current_selection - 1) % len(contacts)
-                display_today_menu(contacts, current_selection)
-            time.sleep(0.3)  # Debounce
-
-        if GPIO.input(DOWN_BUTTON_PIN) == GPIO.LOW:  # Scroll down
-            if contacts:
-                current_selection = (current_selection + 1) % len(contacts)
-                display_today_menu(contacts, current_selection)
-            time.sleep(0.3)  # Debounce
 
-        if GPIO.input(CONFIRM_BUTTON_PIN) == GPIO.LOW:  # OK button pressed
-            if contacts:
-                contact = contacts[current_selection]
-                contact_id, contact_name = contact[0], contact[0]  # Adjust this if ID is a different field
-                handle_contact_interaction(contact_id, contact_name)  # Log event for selected contact
-            time.sleep(0.3)  # Debounce
-
-        if GPIO.input(BACK_BUTTON_PIN) == GPIO.LOW:  # Back button pressed
-            print("Back to main menu")
-            return  # Return to the previous screen (Main Menu)"""
-
-    
 def display_contacts_menu(contacts, current_selection):
     """Display the list of contacts for selection."""
     oled.fill(0)
@@ -633,6 +1054,7 @@ def display_event_type_selection(event_types, current_selection):
     draw.text((0, oled.height - 10), "Back", font=font, fill=255)
 
     oled.image(image)
+    start_marquee()  # Nothing scrolls here, but stop a name left scrolling by the contact list
     oled.show()
 
 # Function to display the rating selection menu
@@ -658,6 +1080,7 @@ def display_event_rating_selection(ratings, current_selection):
     draw.text((0, oled.height - 10), "Back", font=font, fill=255)
 
     oled.image(image)
+    start_marquee()  # Nothing scrolls here, but stop a name left scrolling by the contact list
     oled.show()
     
     
@@ -683,100 +1106,112 @@ def display_event_logged_screen():
 
 # Function to display the contact selection menu (alphabetized, no visual roundabout)
 def display_contacts_menu(contacts, current_selection):
-    """Display the list of contacts for selection, sorted alphabetically."""
-    contacts.sort(key=lambda x: x[1])  # Sort contacts alphabetically by name
+    """Display the list of contacts for selection; callers pass them already sorted by name."""
     oled.fill(0)
     image = Image.new("1", (oled.width, oled.height))
     draw = ImageDraw.Draw(image)
 
-    # Display the list of contacts without showing the visual cycling
-    options = [
-        contacts[current_selection - 1][1] if current_selection > 0 else "",  # Previous contact (blank if first)
-        contacts[current_selection][1],  # Current selected contact
-        contacts[current_selection + 1][1] if current_selection < len(contacts) - 1 else ""  # Next contact (blank if last)
-    ]
+    if contacts:
+        # Display the list of contacts without showing the visual cycling
+        options = [
+            contacts[current_selection - 1][1] if current_selection > 0 else "",  # Previous contact (blank if first)
+            contacts[current_selection][1],  # Current selected contact
+            contacts[current_selection + 1][1] if current_selection < len(contacts) - 1 else ""  # Next contact (blank if last)
+        ]
 
-    # Display the menu options
-    if options[0]:  # Show only if it's not empty
-        draw.text((0, 0), options[0], font=font, fill=255)
-    draw.text((0, 14), "> " + options[1], font=font, fill=255)  # Highlighted current selection
-    if options[2]:  # Show only if it's not empty
-        draw.text((0, 28), options[2], font=font, fill=255)
+        # Display the menu options
+        if options[0]:  # Show only if it's not empty
+            draw.text((0, 0), options[0], font=font, fill=255)
+        draw.text((0, 14), "> ", font=font, fill=255)  # Highlighted current selection
+        draw_name(draw, draw.textbbox((0, 0), "> ", font=font)[2], 14, options[1], font)
+        if options[2]:  # Show only if it's not empty
+            draw.text((0, 28), options[2], font=font, fill=255)
+    else:
+        draw.text((0, 14), "No contacts available", font=font, fill=255)
 
     # Draw labels for Back and OK buttons at the bottom
     draw.text((oled.width - 25, oled.height - 10), "OK", font=font, fill=255)
     draw.text((0, oled.height - 10), "Back", font=font, fill=255)
 
     oled.image(image)
+    start_marquee()
     oled.show()
 
 # Main Log Event flow
 def log_event_menu():
     """Start the Log Event flow."""
-    contacts = get_all_contacts()  # Fetch the contacts from the database
-    event_types = ["Email", "Phone Call", "In-person"]
+    contacts = get_sorted_contacts()  # Fetch the contacts, already sorted by name
+    event_types = EVENT_TYPES
     ratings = [1, 2, 3, 4, 5]
     
     if not contacts:
-        print("No contacts available.")
+        log.debug("No contacts available")
         return
 
-    # Sort contacts alphabetically
-    contacts.sort(key=lambda x: x[1])  # Sort by name
-
     current_screen = 1  # Track which screen we are on (1: Contact, 2: Type, 3: Rating)
-    current_selection = 0  # Initial selection
 
-    # First screen: Select WHO the contact event was with
-    display_contacts_menu(contacts, current_selection)
+    # Pick up where a restart left off, if it was in this flow and the contact still exists
+    state = resume_state("log_event")
+    current_selection = contact_index(contacts, state.get("contact_id"))
+    selected_contact = contacts[current_selection]
+    event_type = state.get("event_type")
+    if state.get("step") in (2, 3) and selected_contact[0] == state.get("contact_id"):
+        current_screen = 3 if state["step"] == 3 and event_type in event_types else 2
+        current_selection = state.get("selection", 0) % len(event_types if current_screen == 2 else ratings)
+
+    # Function to describe the flow for the checkpoint
+    def flow_state():
+        contact_id = contacts[current_selection][0] if current_screen == 1 else selected_contact[0]
+        return {"step": current_screen, "selection": current_selection, "contact_id": contact_id, "event_type": event_type}
+
+    # Normally the first screen: Select WHO the contact event was with
+    if current_screen == 1:
+        display_contacts_menu(contacts, current_selection)
+    elif current_screen == 2:
+        display_event_type_selection(event_types, current_selection)
+    else:
+        display_event_rating_selection(ratings, current_selection)
+    enter_screen("log_event", **flow_state())
+    clear_buttons()
 
     while True:
-        if GPIO.input(UP_BUTTON_PIN) == GPIO.LOW:  # Scroll up
+        sleep_if_idle()  # Blank the display and stop polling when nobody is using it
+        marquee_tick()  # Scroll a long selected name, if there is one
+
+        move, action = next_input()  # At most one redraw per frame, however fast UP/DOWN repeat
+        if move:
             if current_screen == 1:  # Contact selection screen
-                current_selection = (current_selection - 1) % len(contacts)
+                current_selection = (current_selection + move) % len(contacts)
                 display_contacts_menu(contacts, current_selection)
             elif current_screen == 2:  # Event type selection screen
-                current_selection = (current_selection - 1) % len(event_types)
+                current_selection = (current_selection + move) % len(event_types)
                 display_event_type_selection(event_types, current_selection)
             elif current_screen == 3:  # Rating selection screen
-                current_selection = (current_selection - 1) % len(ratings)
+                current_selection = (current_selection + move) % len(ratings)
                 display_event_rating_selection(ratings, current_selection)
-            time.sleep(0.3)  # Debounce
-
-        if GPIO.input(DOWN_BUTTON_PIN) == GPIO.LOW:  # Scroll down
-            if current_screen == 1:
-                current_selection = (current_selection + 1) % len(contacts)
-                display_contacts_menu(contacts, current_selection)
-            elif current_screen == 2:
-                current_selection = (current_selection + 1) % len(event_types)
-                display_event_type_selection(event_types, current_selection)
-            elif current_screen == 3:
-                current_selection = (current_selection + 1) % len(ratings)
-                display_event_rating_selection(ratings, current_selection)
-            time.sleep(0.3)  # Debounce
 
-        if GPIO.input(CONFIRM_BUTTON_PIN) == GPIO.LOW:  # OK button pressed
+        if action == CONFIRM_BUTTON_PIN:  # OK button pressed
             if current_screen == 1:  # Contact selection screen
                 selected_contact = contacts[current_selection]
-                print(f"Selected contact: {selected_contact[1]}")
+                log.debug("Selected contact: %s", selected_contact[1])
                 current_screen = 2  # Move to the next screen (Event Type)
                 current_selection = 0  # Reset selection for next screen
                 display_event_type_selection(event_types, current_selection)
             elif current_screen == 2:  # Event type selection screen
                 event_type = event_types[current_selection]
-                print(f"Selected event type: {event_type}")
+                log.debug("Selected event type: %s", event_type)
                 current_screen = 3  # Move to the next screen (Rating)
                 current_selection = 0  # Reset selection for next screen
                 display_event_rating_selection(ratings, current_selection)
             elif current_screen == 3:  # Rating selection screen
                 event_rating = ratings[current_selection]
-                print(f"Selected rating: {event_rating}")
+                log.debug("Selected rating: %s", event_rating)
                 log_event_to_db(selected_contact[0], event_type, event_rating)  # Log the event
+                return_to_screen(len(screen_stack) - 1)  # Done: a restart now must not offer to log it again
                 display_event_logged_screen()  # Show confirmation screen
-                time.sleep(0.3)  # Debounce
                 return  # Exit after logging the event and showing confirmation
 
-        if GPIO.input(BACK_BUTTON_PIN) == GPIO.LOW:  # Back button pressed
+        if action == BACK_BUTTON_PIN:  # Back button pressed
             if current_screen == 3:  # If on Rating screen, go back to Event Type screen
                 current_screen = 2
                 display_event_type_selection(event_types, current_selection)
@@ -784,9 +1219,12 @@ def log_event_menu():
                 current_screen = 1
                 display_contacts_menu(contacts, current_selection)
             elif current_screen == 1:  # If on Contact Selection, go back to Main Menu and cancel
-                print("Back to main menu, event canceled")
+                log.debug("Back to main menu, event canceled")
+                time.sleep(0.3)  # Debounce for the polling main menu
                 return  # Exit to main menu and cancel the event
-            time.sleep(0.3)  # Debounce
+
+        if move or action:
+            update_screen(**flow_state())
     
     
 
@@ -803,7 +1241,7 @@ def display_contact_splash(contact_name, current_selection):
     visible_items = 3  # Limit to 3 visible menu items
 
     # Display contact's name at the top
-    draw.text((0, 0), contact_name, font=small_font, fill=255)
+    draw_name(draw, 0, 0, contact_name, small_font)
 
     # Menu options for the Contact Splash screen
     menu_options = ["Log Event", "Contact Card", "Frequency", "Snooze"]
@@ -824,10 +1262,11 @@ def display_contact_splash(contact_name, current_selection):
     draw.text((0, oled.height - 12), "Back", font=small_font, fill=255)
 
     oled.image(image)
+    start_marquee()
     oled.show()
 
 # Function to handle the Contact Splash screen logic with consistent back button behavior
-def contact_splash(contact_name):
+def contact_splash(contact_id, contact_name):
     """Logic to navigate through the Contact Splash screen options."""
     menu_options = ["Log Event", "Contact Card", "Frequency", "Snooze"]
     current_selection = 0  # Start with the first menu item
@@ -835,6 +1274,9 @@ def contact_splash(contact_name):
     display_contact_splash(contact_name, current_selection)
 
     while True:
+        sleep_if_idle()  # Blank the display and stop polling when nobody is using it
+        marquee_tick()  # Scroll a long selected name, if there is one
+
         if GPIO.input(UP_BUTTON_PIN) == GPIO.LOW:  # Move selection up
             current_selection = (current_selection - 1) % len(menu_options)
             display_contact_splash(contact_name, current_selection)
@@ -848,32 +1290,34 @@ def contact_splash(contact_name):
         if GPIO.input(CONFIRM_BUTTON_PIN) == GPIO.LOW:  # OK button pressed
             selected_option = menu_options[current_selection]
             if selected_option == "Log Event":
-                log_event_menu_skip_contact(contact_name)  # Skip to Event Type screen
+                log_event_menu_skip_contact(contact_id, contact_name)  # Skip to Event Type screen
             elif selected_option == "Contact Card":
-                # Handle showing contact card
-                pass
+                contact_card(contact_id)  # Show details and event history
+                display_contact_splash(contact_name, current_selection)
             elif selected_option == "Frequency":
-                # Handle frequency adjustments
-                pass
+                frequency_menu(contact_id, contact_name)  # Adjust how often to keep in touch
+                display_contact_splash(contact_name, current_selection)
             elif selected_option == "Snooze":
-                # Handle snoozing the contact
-                pass
+                snooze_menu(contact_id)  # Pick how long to snooze for
+                display_contact_splash(contact_name, current_selection)
             time.sleep(0.3)  # Debounce
 
         if GPIO.input(BACK_BUTTON_PIN) == GPIO.LOW:  # Back button pressed
-            print("Returning to Today list")
+            log.debug("Returning to Today list")
             return  # Go back to the Today list
             time.sleep(0.3)  # Debounce
 
 # Modify the end of the Log Event flow to go back to the Today screen
-def log_event_menu_skip_contact(contact_name):
+def log_event_menu_skip_contact(contact_id, contact_name):
     """Log Event flow starting from Event Type screen, skipping contact selection."""
-    event_types = ["Email", "Phone Call", "In-person"]
+    event_types = EVENT_TYPES
     current_selection = 0  # Start with the first event type
 
     display_event_type_selection(event_types, current_selection)  # Display event types
 
     while True:
+        sleep_if_idle()  # Blank the display and stop polling when nobody is using it
+
         if GPIO.input(UP_BUTTON_PIN) == GPIO.LOW:  # Move selection up
             current_selection = (current_selection - 1) % len(event_types)
             display_event_type_selection(event_types, current_selection)
@@ -886,38 +1330,48 @@ def log_event_menu_skip_contact(contact_name):
 
         if GPIO.input(CONFIRM_BUTTON_PIN) == GPIO.LOW:  # OK button pressed
             event_type = event_types[current_selection]
-            print(f"Selected event type: {event_type} for {contact_name}")
-            log_event_rating(contact_name, event_type)  # Proceed to event rating screen
+            log.debug("Selected event type: %s for %s", event_type, contact_name)
+            log_event_rating(contact_id, event_type)  # Proceed to event rating screen
             return  # Exit after rating
 
         if GPIO.input(BACK_BUTTON_PIN) == GPIO.LOW:  # Back button pressed
-            print("Returning to Contact Splash screen")
+            log.debug("Returning to Contact Splash screen")
             return  # Return to Contact Splash screen
             time.sleep(0.3)  # Debounce
 
 # Function to handle rating the event (1-5 scale)
-def log_event_rating(contact_name, event_type):
+def log_event_rating(contact_id, event_type):
     """Flow to rate the event after selecting event type."""
-    # ... (Rating selection and logging)
+    ratings = [1, 2, 3, 4, 5]
+    current_selection = 0
 
-    # After the event is logged, go back to the Today screen and strike-through the contact's name
-    mark_contact_as_done(contact_name)
-    today_menu()  # Return to Today screen
+    display_event_rating_selection(ratings, current_selection)
 
-def mark_contact_as_done(contact_name):
-    """Update the last_contact_date for the contact to today's date."""
-    conn = sqlite3.connect('contacts_events.db')
-    cursor = conn.cursor()
+    while True:
+        sleep_if_idle()  # Blank the display and stop polling when nobody is using it
 
-    # Update the last_contact_date to today's date
-    cursor.execute('''
-        UPDATE contacts
-        SET last_contact_date = date('now')
-        WHERE name = ?
-    ''', (contact_name,))
+        if GPIO.input(UP_BUTTON_PIN) == GPIO.LOW:  # Move selection up
+            current_selection = (current_selection - 1) % len(ratings)
+            display_event_rating_selection(ratings, current_selection)
+            time.sleep(0.3)  # Debounce
 
-    conn.commit()
-    conn.close()
+        if GPIO.input(DOWN_BUTTON_PIN) == GPIO.LOW:  # Move selection down
+            current_selection = (current_selection + 1) % len(ratings)
+            display_event_rating_selection(ratings, current_selection)
+            time.sleep(0.3)  # Debounce
+
+        if GPIO.input(CONFIRM_BUTTON_PIN) == GPIO.LOW:  # OK button pressed
+            # Logging the event also sets last_contact_day by primary key, marking the contact done
+            log_event_to_db(contact_id, event_type, ratings[current_selection])
+            display_event_logged_screen()
+            break
+
+        if GPIO.input(BACK_BUTTON_PIN) == GPIO.LOW:  # Back button pressed
+            time.sleep(0.3)  # Debounce
+            return  # Back out without logging
+
+    # After the event is logged, go back to the Today screen and strike-through the contact's name
+    today_menu()  # Return to Today screen
 
 # Function to show confirmation after logging an event
 def display_event_logged_screen():
@@ -937,14 +1391,417 @@ def display_event_logged_screen():
     time.sleep(1.5)  # Show the message for 1.5 seconds before returning
 
 # Function to call when a contact is selected from the Today screen
-def today_contact_selected(contact_name):
+def today_contact_selected(contact_id, contact_name):
     """Handle when a contact is selected from the Today list."""
-    contact_splash(contact_name)  # Go to the Contact Splash screen
-    
-    
+    contact_splash(contact_id, contact_name)  # Go to the Contact Splash screen
     
 
+
+######################### CONTACT CARD #################################
+
+HISTORY_PAGE_SIZE = 2  # Event rows that fit under the contact details
+
+# Function to display a contact's details and one page of their event history
+def display_contact_card(contact, events, has_newer, has_older, stats=None):
+    """Display name, phone/email, frequency and last contact, the visible history page and the contact's stats."""
+    oled.fill(0)
+    image = Image.new("1", (oled.width, oled.height))
+    draw = ImageDraw.Draw(image)
+
+    contact_id, name, phone, email, frequency, last_contact_day = contact
+
+    draw.text((0, 0), name, font=font, fill=255)
+    draw.text((0, 10), phone or email or "", font=font, fill=255)
+    draw.text((0, 20), f"Every {frequency or '-'}d  Last {day_to_text(last_contact_day) or '-'}", font=font, fill=255)
+    draw.line((0, 31, oled.width, 31), fill=255)
+
+    if events:
+        for i, (seq, event_day, event_type, rating) in enumerate(events):
+            draw.text((0, 33 + i * 10), f"{day_to_text(event_day)} {event_type} {rating}", font=font, fill=255)
+    else:
+        draw.text((0, 33), "No events logged", font=font, fill=255)
+
+    # Arrows show whether UP/DOWN lead to newer/older events
+    if has_newer:
+        draw.text((oled.width - 6, 33), "^", font=font, fill=255)
+    if has_older:
+        draw.text((oled.width - 6, 43), "v", font=font, fill=255)
+
+    draw.text((0, oled.height - 10), "Back", font=font, fill=255)
+    draw.text((30, oled.height - 10), format_contact_stats(stats), font=font, fill=255)
+
+    oled.image(image)
+    oled.show()
+
+# Function to sum up a contact's stats in one short line: real cadence, mean rating and its trend
+def format_contact_stats(stats):
+    if stats is None:
+        return ""
+    parts = []
+    if stats['mean_interval'] is not None:
+        parts.append(f"~{stats['mean_interval']:.0f}d")
+    if stats['mean_rating'] is not None:
+        parts.append(f"*{stats['mean_rating']:.1f}")
+    if stats['rating_trend'] is not None:
+        parts.append(f"{stats['rating_trend']:+.1f}")  # Per RATING_TREND_DAYS
+    return " ".join(parts)
+
+# Contact Card logic: UP/DOWN page through the history, BACK returns to the splash screen
+def contact_card(contact_id):
+    """Show a contact's card, fetching only the history page on screen."""
+    contact = get_contact_details(contact_id)
+    if contact is None:
+        return
+
+    events = get_event_page(contact_id, HISTORY_PAGE_SIZE)
+    has_newer = False
+    has_older = bool(events) and bool(get_event_page(contact_id, 1, after=events[-1][:2]))
+    stats = get_stats_for_contact(contact_id)
+
+    display_contact_card(contact, events, has_newer, has_older, stats)
+
+    while True:
+        sleep_if_idle()  # Blank the display and stop polling when nobody is using it
+
+        if GPIO.input(UP_BUTTON_PIN) == GPIO.LOW:  # Newer events
+            if has_newer:
+                events = get_event_page(contact_id, HISTORY_PAGE_SIZE, before=events[0][:2])
+                has_newer = bool(get_event_page(contact_id, 1, before=events[0][:2]))
+                has_older = True
+                display_contact_card(contact, events, has_newer, has_older, stats)
+            time.sleep(0.3)  # Debounce
+
+        if GPIO.input(DOWN_BUTTON_PIN) == GPIO.LOW:  # Older events
+            if has_older:
+                events = get_event_page(contact_id, HISTORY_PAGE_SIZE, after=events[-1][:2])
+                has_older = bool(get_event_page(contact_id, 1, after=events[-1][:2]))
+                has_newer = True
+                display_contact_card(contact, events, has_newer, has_older, stats)
+            time.sleep(0.3)  # Debounce
+
+        if GPIO.input(BACK_BUTTON_PIN) == GPIO.LOW:  # Back button pressed
+            time.sleep(0.3)  # Debounce
+            return  # Back to the Contact Splash screen
+
+
+######################### SNOOZE #################################
+
+# Snooze lengths offered on the splash screen, in days
+SNOOZE_OPTIONS = [("1 day", 1), ("1 week", 7), ("1 month", 30)]
+
+# Snooze logic: pick a length, store snooze_until_day and patch today's plan
+def snooze_menu(contact_id):
+    """Let the user snooze a contact for a day, a week or a month."""
+    labels = [label for label, days in SNOOZE_OPTIONS]
+    current_selection = 0
+
+    display_event_type_selection(labels, current_selection)  # Same list layout as the event types
+
+    while True:
+        sleep_if_idle()  # Blank the display and stop polling when nobody is using it
+
+        if GPIO.input(UP_BUTTON_PIN) == GPIO.LOW:  # Move selection up
+            current_selection = (current_selection - 1) % len(labels)
+            display_event_type_selection(labels, current_selection)
+            time.sleep(0.3)  # Debounce
+
+        if GPIO.input(DOWN_BUTTON_PIN) == GPIO.LOW:  # Move selection down
+            current_selection = (current_selection + 1) % len(labels)
+            display_event_type_selection(labels, current_selection)
+            time.sleep(0.3)  # Debounce
+
+        if GPIO.input(CONFIRM_BUTTON_PIN) == GPIO.LOW:  # OK button pressed
+            # Swap the snoozed contact out of today's plan in the same transaction
+            snooze_until_day = apply_contact_edit(record_snooze, contact_id, SNOOZE_OPTIONS[current_selection][1])
+            log.info("Snoozed contact %s", contact_id, extra={"fields": {"until": day_to_text(snooze_until_day)}})
+            time.sleep(0.3)  # Debounce
+            return  # Back to the Contact Splash screen
+
+        if GPIO.input(BACK_BUTTON_PIN) == GPIO.LOW:  # Back button pressed
+            time.sleep(0.3)  # Debounce
+            return  # Back to the Contact Splash screen without snoozing
+
+
+######################### FREQUENCY EDITOR #################################
+
+# Frequencies (in days) the UP/DOWN buttons step through
+FREQUENCY_STEPS = [1, 3, 7, 14, 21, 30, 45, 60, 90, 120, 180, 270, 365, 730]
+
+# Function to display the frequency being edited
+def display_frequency_editor(contact_name, frequency):
+    """Display the contact's name and the frequency currently dialled in."""
+    oled.fill(0)
+    image = Image.new("1", (oled.width, oled.height))
+    draw = ImageDraw.Draw(image)
+
+    draw.text((0, 0), contact_name, font=font, fill=255)
+    draw.text((0, 18), "Every", font=font, fill=255)
+    draw.text((36, 14), str(frequency), font=large_font, fill=255)
+    draw.text((76, 18), "days", font=font, fill=255)
+
+    # Draw labels for Back and OK buttons at the bottom
+    draw.text((oled.width - 25, oled.height - 10), "OK", font=font, fill=255)
+    draw.text((0, oled.height - 10), "Back", font=font, fill=255)
+
+    oled.image(image)
+    oled.show()
+
+# Frequency editor logic: UP/DOWN change the value, OK asks whether to apply it to one or many contacts
+def frequency_menu(contact_id, contact_name):
+    """Edit a contact's frequency, or every contact sharing their current frequency."""
+    contact = get_contact_details(contact_id)
+    original_frequency = contact[4] if contact else None
+
+    steps = list(FREQUENCY_STEPS)
+    if original_frequency and original_frequency not in steps:
+        steps.append(original_frequency)
+        steps.sort()
+    current_step = steps.index(original_frequency) if original_frequency in steps else steps.index(30)
+
+    display_frequency_editor(contact_name, steps[current_step])
+
+    while True:
+        sleep_if_idle()  # Blank the display and stop polling when nobody is using it
+
+        if GPIO.input(UP_BUTTON_PIN) == GPIO.LOW:  # Longer gap between contacts
+            current_step = min(current_step + 1, len(steps) - 1)
+            display_frequency_editor(contact_name, steps[current_step])
+            time.sleep(0.3)  # Debounce
+
+        if GPIO.input(DOWN_BUTTON_PIN) == GPIO.LOW:  # Shorter gap between contacts
+            current_step = max(current_step - 1, 0)
+            display_frequency_editor(contact_name, steps[current_step])
+            time.sleep(0.3)  # Debounce
+
+        if GPIO.input(CONFIRM_BUTTON_PIN) == GPIO.LOW:  # OK button pressed
+            time.sleep(0.3)  # Debounce
+            frequency = steps[current_step]
+            scope = choose_frequency_scope(original_frequency)
+            if scope is None:
+                display_frequency_editor(contact_name, frequency)  # Back out of the scope choice
+                continue
+            if scope == "all":
+                changed = apply_contact_edit(record_bulk_frequency, frequency, original_frequency)
+                log.info("Frequency of %d contacts set to %d", changed, frequency)
+            else:
+                apply_contact_edit(record_contact_frequency, contact_id, frequency)
+            return  # Back to the Contact Splash screen
+
+        if GPIO.input(BACK_BUTTON_PIN) == GPIO.LOW:  # Back button pressed
+            time.sleep(0.3)  # Debounce
+            return  # Back to the Contact Splash screen without saving
+
+# Function to ask whether the new frequency is for this contact or everyone sharing the old one
+def choose_frequency_scope(original_frequency):
+    """Return 'one', 'all' or None (Back). Skips the question if there is no old frequency to match."""
+    if not original_frequency:
+        return "one"
+
+    options = ["This contact", f"All every {original_frequency}d"]
+    current_selection = 0
+    display_event_type_selection(options, current_selection)  # Same list layout as the event types
+
+    while True:
+        sleep_if_idle()  # Blank the display and stop polling when nobody is using it
+
+        if GPIO.input(UP_BUTTON_PIN) == GPIO.LOW or GPIO.input(DOWN_BUTTON_PIN) == GPIO.LOW:
+            current_selection = 1 - current_selection
+            display_event_type_selection(options, current_selection)
+            time.sleep(0.3)  # Debounce
+
+        if GPIO.input(CONFIRM_BUTTON_PIN) == GPIO.LOW:  # OK button pressed
+            time.sleep(0.3)  # Debounce
+            return "one" if current_selection == 0 else "all"
+
+        if GPIO.input(BACK_BUTTON_PIN) == GPIO.LOW:  # Back button pressed
+            time.sleep(0.3)  # Debounce
+            return None
+
+
+######################### FORECAST #################################
+
+FORECAST_WEEKS = 4  # Weeks shown at once; UP/DOWN move the window a week at a time
+FORECAST_MAX_WEEKS = 52  # How far ahead the window can be moved
+FORECAST_BAR_WIDTH = 4  # Pixels per day: 28 days x 4 px fits the 128 px display with room for labels
+FORECAST_TOP = 12  # Chart area between the title line and the button labels
+FORECAST_BOTTOM = 52
+
+# Function to draw the due-date histogram as one bar per day
+def display_forecast(forecast, first_week):
+    """Draw FORECAST_WEEKS of daily due counts, starting first_week weeks from today."""
+    oled.fill(0)
+    image = Image.new("1", (oled.width, oled.height))
+    draw = ImageDraw.Draw(image)
+
+    days = forecast[first_week * 7:(first_week + FORECAST_WEEKS) * 7]
+    peak = max(days) if days else 0
+    title = "Due now" if first_week == 0 else f"Due in {first_week}w"
+    draw.text((0, 0), f"{title}: {sum(days)}", font=font, fill=255)
+    draw.text((oled.width - 6 * len(str(peak)), 0), str(peak), font=font, fill=255)  # Scale: tallest bar
+
+    chart_height = FORECAST_BOTTOM - FORECAST_TOP
+    for i, count in enumerate(days):
+        if count:
+            x = i * FORECAST_BAR_WIDTH
+            height = max(1, round(count / peak * chart_height))
+            draw.rectangle((x, FORECAST_BOTTOM - height, x + FORECAST_BAR_WIDTH - 2, FORECAST_BOTTOM), fill=255)
+
+    # Baseline with a tick at the start of each week
+    draw.line((0, FORECAST_BOTTOM + 1, len(days) * FORECAST_BAR_WIDTH, FORECAST_BOTTOM + 1), fill=255)
+    for week in range(FORECAST_WEEKS + 1):
+        x = min(week * 7 * FORECAST_BAR_WIDTH, oled.width - 1)
+        draw.line((x, FORECAST_BOTTOM + 1, x, FORECAST_BOTTOM + 3), fill=255)
+
+    draw.text((0, oled.height - 10), "Back", font=font, fill=255)
+
+    oled.image(image)
+    start_marquee()
+    oled.show()
+
+# Forecast logic: reads the maintained histogram once, UP/DOWN move through the weeks ahead
+def forecast_menu():
+    """Show how many contacts fall due on each of the coming days."""
+    forecast = get_due_forecast(FORECAST_MAX_WEEKS * 7)
+    first_week = 0
+
+    display_forecast(forecast, first_week)
+
+    while True:
+        sleep_if_idle()  # Blank the display and stop polling when nobody is using it
+
+        if GPIO.input(UP_BUTTON_PIN) == GPIO.LOW:  # Earlier weeks
+            first_week = max(first_week - 1, 0)
+            display_forecast(forecast, first_week)
+            time.sleep(0.3)  # Debounce
+
+        if GPIO.input(DOWN_BUTTON_PIN) == GPIO.LOW:  # Later weeks
+            first_week = min(first_week + 1, FORECAST_MAX_WEEKS - FORECAST_WEEKS)
+            display_forecast(forecast, first_week)
+            time.sleep(0.3)  # Debounce
+
+        if GPIO.input(BACK_BUTTON_PIN) == GPIO.LOW:  # Back button pressed
+            time.sleep(0.3)  # Debounce
+            return  # Back to the main menu
+
+
+######################### SEARCH SCREEN #################################
+
+# Letters offered on the UP/DOWN wheel; "Go" switches from typing to browsing the results
+LETTER_WHEEL = list("ABCDEFGHIJKLMNOPQRSTUVWXYZ '-") + ["Go"]
+SEARCH_RESULT_LIMIT = 20
+
+# Function to display the search screen: typed prefix, wheel letter and the top matches
+def display_search_screen(query, wheel_index, results, current_selection, browsing):
+    """Display the prefix being typed with the current wheel letter, and the matching contacts."""
+    oled.fill(0)
+    image = Image.new("1", (oled.width, oled.height))
+    draw = ImageDraw.Draw(image)
+
+    # Show the typed text, then the letter the wheel is on in brackets (hidden while browsing)
+    if browsing:
+        draw.text((0, 0), "Find: " + query, font=font, fill=255)
+    else:
+        draw.text((0, 0), "Find: " + query + "[" + LETTER_WHEEL[wheel_index] + "]", font=font, fill=255)
+
+    if results:
+        # Keep the highlighted result in view, three rows at a time
+        start_index = max(0, min(current_selection - 1, len(results) - 3))
+        for i in range(start_index, min(start_index + 3, len(results))):
+            y_position = 14 + (i - start_index) * 12
+            if browsing and i == current_selection:
+                draw.text((0, y_position), "> " + results[i][1], font=font, fill=255)
+            else:
+                draw.text((0, y_position), results[i][1], font=font, fill=255)
+    elif query:
+        draw.text((0, 14), "No matches", font=font, fill=255)
+
+    # Draw labels for Back and OK buttons at the bottom
+    draw.text((oled.width - 25, oled.height - 10), "OK", font=font, fill=255)
+    draw.text((0, oled.height - 10), "Back" if browsing or not query else "Del", font=font, fill=255)
+
+    oled.image(image)
+    oled.show()
+
+# Search screen logic: UP/DOWN turn the letter wheel, OK appends, BACK deletes
+def search_menu():
+    """Build a name prefix with the buttons and look it up in the contacts search index."""
+    query = ""
+    wheel_index = 0
+    results = []
+    current_selection = 0
+    browsing = False  # False while typing, True while scrolling through the results
+
+    display_search_screen(query, wheel_index, results, current_selection, browsing)
+
+    while True:
+        sleep_if_idle()  # Blank the display and stop polling when nobody is using it
+
+        if GPIO.input(UP_BUTTON_PIN) == GPIO.LOW:
+            if browsing:
+                current_selection = (current_selection - 1) % len(results)
+            else:
+                wheel_index = (wheel_index - 1) % len(LETTER_WHEEL)
+            display_search_screen(query, wheel_index, results, current_selection, browsing)
+            time.sleep(0.15)  # Short debounce so the wheel can be spun quickly
+
+        if GPIO.input(DOWN_BUTTON_PIN) == GPIO.LOW:
+            if browsing:
+                current_selection = (current_selection + 1) % len(results)
+            else:
+                wheel_index = (wheel_index + 1) % len(LETTER_WHEEL)
+            display_search_screen(query, wheel_index, results, current_selection, browsing)
+            time.sleep(0.15)  # Short debounce so the wheel can be spun quickly
+
+        if GPIO.input(CONFIRM_BUTTON_PIN) == GPIO.LOW:  # OK button pressed
+            if browsing:
+                contact_splash(results[current_selection][0], results[current_selection][1])  # Open the chosen contact
+            elif LETTER_WHEEL[wheel_index] == "Go":
+                if results:
+                    browsing = True
+                    current_selection = 0
+            else:
+                query += LETTER_WHEEL[wheel_index].lower()
+                results = search_contacts(query, SEARCH_RESULT_LIMIT)  # Re-run the prefix lookup on every keystroke
+            display_search_screen(query, wheel_index, results, current_selection, browsing)
+            time.sleep(0.3)  # Debounce
+
+        if GPIO.input(BACK_BUTTON_PIN) == GPIO.LOW:  # Back button pressed
+            if browsing:
+                browsing = False  # Back to typing
+            elif query:
+                query = query[:-1]
+                results = search_contacts(query, SEARCH_RESULT_LIMIT)
+            else:
+                return  # Nothing typed: go back to the main menu
+            display_search_screen(query, wheel_index, results, current_selection, browsing)
+            time.sleep(0.3)  # Debounce
+
+
 if __name__ == "__main__":
-    main_menu()
+    parser = argparse.ArgumentParser(description="Networking bot UI.")
+    parser.add_argument("--replay", metavar="TRACE", help="play a recorded button trace back and report latencies")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed multiplier")
+    parser.add_argument("--frames", metavar="PATH", help="save the frames captured during a replay")
+    args = parser.parse_args()
+
+    setup_logging(debug=DEBUG_LOGGING)
+    if args.replay:
+        trace_path = os.path.abspath(args.replay)
+        frames_path = args.frames and os.path.abspath(args.frames)
+        use_replay_copy()
+    setup_database()
+    start_database_worker()
+    if args.replay:
+        restore_today_plan()  # No midnight rollover or backups during a replay
+        replay_button_trace(trace_path, args.speed, frames_path)  # Neither traced nor checkpointed
+    else:
+        start_day_rollover_service()
+        start_backup_thread(if_older_than=BACKUP_MAX_AGE)
+        trace_recorder = start_trace_recorder(resume_stack)
+        checkpointer = Checkpointer()
+    try:
+        main_menu()
+    except KeyboardInterrupt:
+        pass
     
     